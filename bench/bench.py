@@ -0,0 +1,329 @@
+# Throughput benchmark and golden output check for the sx128x_in HLA.
+#
+# Usage: python bench/bench.py [--packets N] [--repeat N] [--tolerance PERCENT] [--update-golden] [--golden-only]
+#
+# The golden corpus (bench/golden.jsonl) holds the decoded output of every opcode sample and of
+# synthetic ExpressLRS and ranging streams, decoded with default settings and with every opt-in
+# feature (GOLDEN_STREAMS): frames, the report finish() prints and the export/snapshot files. The
+# check runs before any timing, so a performance change that alters what the analyzer outputs fails
+# loudly instead of producing a faster but different decoder. Regenerate it with --update-golden
+# only when the output change is intended.
+#
+# The replay check decodes one capture with the offline replay in a single shard and in several, the
+# decoded output and the snapshot file must not depend on where the shards start.
+#
+# Throughput is measured against the original decoder in reference_sx128x_in.py, interleaving runs
+# of both on the same stream. The benchmark fails when the decoder is more than --tolerance percent
+# slower than that reference.
+#
+# With NumPy installed, the same ExpressLRS mix is also decoded from raw CS/SCK/MOSI/MISO transitions
+# through the sx128x_digital front end.
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import synth
+import reference_sx128x_in
+from sx128x_in import sx128x_in, COMMANDS
+from sx128x_replay import create_analyzer, render, replay
+from sx128x_export import read_binary
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden.jsonl")
+
+# Packets in the ExpressLRS streams of the golden corpus, default settings and opt-in features
+GOLDEN_PACKETS = 200
+FEATURE_PACKETS = 30
+
+# Exchanges in the ranging stream of the golden corpus
+GOLDEN_EXCHANGES = 60
+
+# (name, transactions, gap between transactions in seconds, settings) of the golden streams. Files
+# named by the "<temp>" settings are created in a temporary directory, their contents become records.
+GOLDEN_STREAMS = (
+    ("elrs", synth.elrs_traffic(GOLDEN_PACKETS), synth.GAP_TIME, {}),
+    ("elrs packets", synth.elrs_traffic(GOLDEN_PACKETS), synth.GAP_TIME, { "packet_frames": "Packets only" }),
+    ("elrs status", synth.elrs_traffic(FEATURE_PACKETS), synth.GAP_TIME, { "status_byte": "Decode" }),
+    ("elrs coalesced", synth.elrs_traffic(FEATURE_PACKETS), synth.GAP_TIME, { "coalesce": "Identical transactions" }),
+    ("elrs cached", synth.elrs_traffic(FEATURE_PACKETS), synth.GAP_TIME, { "decode_cache": "256" }),
+    ("elrs analytics", synth.elrs_traffic(FEATURE_PACKETS), synth.GAP_TIME, {
+        "packet_frames": "With commands",
+        "irq_latency": "Summary",
+        "bus_stats": "1 ms",
+        "radio_modes": "Frames and summary",
+        "channel_plan": "ExpressLRS ISM 2.4 GHz (80 ch)",
+        "payload_protocol": "ExpressLRS OTA",
+    }),
+    # 5 ms between transactions, so the stream spans several traffic summary intervals
+    ("elrs traffic", synth.elrs_traffic(FEATURE_PACKETS), 5e-3, { "traffic_stats": "1 s frames and dump" }),
+    ("elrs export", synth.elrs_traffic(FEATURE_PACKETS), synth.GAP_TIME, {
+        "export": "JSONL",
+        "export_file": "<temp>",
+        "checkpoints": "On change",
+        "checkpoint_file": "<temp>",
+    }),
+    ("elrs binary export", synth.elrs_traffic(FEATURE_PACKETS), synth.GAP_TIME, { "export": "Binary", "export_file": "<temp>" }),
+    ("ranging", synth.ranging_traffic(GOLDEN_EXCHANGES), synth.GAP_TIME, {}),
+)
+
+# Shards of the replay check and its settings, files named "<temp>" are created in a temporary directory
+REPLAY_SHARDS = 4
+REPLAY_SETTINGS = {
+    "payload_protocol": "ExpressLRS OTA",
+    "checkpoints": "On change",
+    "checkpoint_file": "<temp>",
+}
+
+# RxGain written in the first shard of the replay check and read back with another value in the last one
+REPLAY_REGISTER_WRITE = (bytes((0x18, 0x08, 0x91, 0xAB)), bytes(4))
+REPLAY_REGISTER_READ = (bytes((0x19, 0x08, 0x91, 0x00, 0x00)), bytes((0x00, 0x00, 0x00, 0x00, 0xCD)))
+
+def json_value(value):
+    if isinstance(value, (bytes, bytearray)):
+        return value.hex()
+    return value
+
+def results(analyzer, frames):
+    """Decode frames and yield every AnalyzerFrame the analyzer returns."""
+    for frame in frames:
+        result = analyzer.decode(frame)
+        if result is None:
+            continue
+        if isinstance(result, list):
+            yield from result
+        else:
+            yield result
+
+def record(result, **extra) -> dict:
+    rec = dict(extra)
+    rec["type"] = result.type
+    rec["decoded"] = render(result)
+    rec["data"] = { key: json_value(value) for key, value in sorted(result.data.items()) }
+    return rec
+
+def file_records(name: str, setting: str, path: str) -> list:
+    if setting == "export_file" and path.endswith(".bin"):
+        return [{ "stream": name, setting: [json_value(field) for field in rec] } for rec in read_binary(path)]
+    with open(path) as f:
+        return [{ "stream": name, setting: json.loads(line) } for line in f]
+
+def stream_records(name: str, transactions: list, gap: float, settings: dict) -> list:
+    records = []
+    with tempfile.TemporaryDirectory() as tmp:
+        settings = dict(settings)
+        files = {}
+        for setting, value in settings.items():
+            if value == "<temp>":
+                extension = ".bin" if settings.get("export") == "Binary" else ".jsonl"
+                settings[setting] = files[setting] = os.path.join(tmp, setting + extension)
+        analyzer = create_analyzer(settings)
+        for result in results(analyzer, synth.stream(transactions, gap)):
+            records.append(record(result, stream=name))
+        run = analyzer.flush()
+        if run is not None:
+            records.append(record(run, stream=name))
+        report = io.StringIO()
+        with contextlib.redirect_stdout(report):
+            analyzer.finish()
+        records += [{ "stream": name, "report": line } for line in report.getvalue().splitlines()]
+        for setting, path in sorted(files.items()):
+            records += file_records(name, setting, path)
+    return records
+
+def golden_records() -> list:
+    records = []
+    for packetType, mosi, miso in synth.opcode_samples():
+        analyzer = sx128x_in()
+        analyzer.packetType = packetType
+        for result in results(analyzer, synth.transaction_frames(mosi, miso, 0.0)):
+            records.append(record(result, packetType=packetType.name, mosi=mosi.hex(), miso=miso.hex()))
+    for name, transactions, gap, settings in GOLDEN_STREAMS:
+        records += stream_records(name, transactions, gap, settings)
+    return records
+
+def check_golden(update: bool) -> bool:
+    with contextlib.redirect_stdout(io.StringIO()):
+        records = golden_records()
+    if update:
+        with open(GOLDEN_PATH, "w") as f:
+            for rec in records:
+                f.write(json.dumps(rec, sort_keys=True) + "\n")
+        print("golden: wrote {} records to {}".format(len(records), GOLDEN_PATH))
+        return True
+
+    with open(GOLDEN_PATH) as f:
+        expected = [json.loads(line) for line in f]
+    mismatches = [(i, e, r) for i, (e, r) in enumerate(zip(expected, records)) if e != r]
+    if len(expected) != len(records):
+        print("golden: FAILED, expected {} records, decoded {}".format(len(expected), len(records)))
+        return False
+    if mismatches:
+        print("golden: FAILED, {} of {} records differ".format(len(mismatches), len(records)))
+        for i, e, r in mismatches[:10]:
+            print("  #{}\n    expected {}\n    decoded  {}".format(i, json.dumps(e, sort_keys=True), json.dumps(r, sort_keys=True)))
+        return False
+    print("golden: OK ({} records)".format(len(records)))
+    return True
+
+def replay_outputs(path: str, shards: int, tmp: str) -> tuple:
+    """(decoded CSV, snapshot file) of the offline replay of path in shards."""
+    settings = dict(REPLAY_SETTINGS)
+    for setting, value in settings.items():
+        if value == "<temp>":
+            settings[setting] = os.path.join(tmp, "{}.{}".format(setting, shards))
+    output = io.StringIO()
+    with contextlib.redirect_stderr(io.StringIO()):
+        replay(path, output, min(shards, 2), shards, settings)
+    with open(settings["checkpoint_file"]) as f:
+        return output.getvalue(), f.read()
+
+def check_replay() -> bool:
+    transactions = [REPLAY_REGISTER_WRITE] + synth.elrs_traffic(FEATURE_PACKETS) + [REPLAY_REGISTER_READ]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "capture.csv")
+        with open(path, "w") as f:
+            f.writelines(synth.export_lines(synth.stream(transactions)))
+        decoded, snapshots = replay_outputs(path, 1, tmp)
+        shardDecoded, shardSnapshots = replay_outputs(path, REPLAY_SHARDS, tmp)
+    if "ReadRegisterMismatch" not in decoded:
+        print("replay: FAILED, the register read-back is not flagged as a mismatch")
+        return False
+    if shardDecoded != decoded or shardSnapshots != snapshots:
+        print("replay: FAILED, {} shards decode differently from a single shard".format(REPLAY_SHARDS))
+        for expected, line in zip(decoded.splitlines() + snapshots.splitlines(), shardDecoded.splitlines() + shardSnapshots.splitlines()):
+            if expected != line:
+                print("  expected {}\n  decoded  {}".format(expected, line))
+                break
+        return False
+    print("replay: OK ({} shards)".format(REPLAY_SHARDS))
+    return True
+
+def count_transactions(frames) -> int:
+    return sum(1 for frame in frames if frame.type == "disable")
+
+def run_decode(analyzer, frames) -> float:
+    """Wall-clock time of decoding frames with analyzer."""
+    decode = analyzer.decode
+    start = time.perf_counter()
+    for frame in frames:
+        decode(frame)
+    return time.perf_counter() - start
+
+def time_decode(frames, repeat: int) -> float:
+    """Best wall-clock time of decoding frames with a fresh analyzer, out of repeat runs."""
+    return min(run_decode(sx128x_in(), frames) for _ in range(repeat))
+
+def time_against_reference(frames, repeat: int) -> tuple:
+    """Best wall-clock times (decoder, reference decoder) of decoding frames, runs of both interleaved
+    so that machine load affects them alike."""
+    best = [None, None]
+    for _ in range(repeat):
+        for i, analyzer in enumerate((sx128x_in(), reference_sx128x_in.sx128x_in())):
+            elapsed = run_decode(analyzer, frames)
+            if best[i] is None or elapsed < best[i]:
+                best[i] = elapsed
+    return tuple(best)
+
+def bench_throughput(packets: int, repeat: int, tolerance: float) -> bool:
+    frames = synth.stream(synth.elrs_traffic(packets))
+    transactions = count_transactions(frames)
+    elapsed, reference = time_against_reference(frames, repeat)
+    print("\nExpressLRS mix: {} transactions, {} frames".format(transactions, len(frames)))
+    print("  {:>12,.0f} transactions/s  {:>8.2f} us/transaction".format(transactions / elapsed, 1e6 * elapsed / transactions))
+    print("  {:>12,.0f} transactions/s  {:>8.2f} us/transaction  reference decoder".format(transactions / reference, 1e6 * reference / transactions))
+    print("  {:>12.2f}x the reference throughput".format(reference / elapsed))
+
+    # Memory: peak traced memory above the live heap while a transaction is decoded (its temporary
+    # objects), and blocks still allocated after decoding (leaks/caches). Python does not count
+    # allocations, so neither is an allocation count.
+    analyzer = sx128x_in()
+    decode = analyzer.decode
+    tracemalloc.start()
+    blocks = sys.getallocatedblocks()
+    transient = 0
+    live = 0
+    for frame in frames:
+        if frame.type == "enable":
+            live = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        decode(frame)
+        if frame.type == "disable":
+            transient += tracemalloc.get_traced_memory()[1] - live
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    retained = sys.getallocatedblocks() - blocks
+    print("  {:>12.0f} transient bytes/transaction  {:>8.3f} retained blocks/transaction  {:>8.1f} KiB peak traced".format(
+        transient / transactions, retained / transactions, peak / 1024))
+
+    if elapsed > reference * (1 + tolerance / 100):
+        print("throughput: FAILED, {:.1f}% slower than the reference decoder (tolerance {}%)".format((elapsed / reference - 1) * 100, tolerance))
+        return False
+    return True
+
+def bench_digital(packets: int, repeat: int):
+    # Raw transitions -> decoded commands through the NumPy front end, against the SPI analyzer frame path
+    try:
+        import numpy as np
+        from sx128x_digital import spi_transactions
+    except ImportError:
+        print("\nRaw digital front end: skipped, NumPy is not installed")
+        return
+    transactions = synth.elrs_traffic(packets)
+    rows = np.array(synth.digital_rows(transactions))
+    block = (rows[:, 0],) + tuple(rows[:, i].astype(np.uint8) for i in range(1, 5))
+    best = None
+    for _ in range(repeat):
+        analyzer = sx128x_in()
+        decode_transaction = analyzer.decode_transaction
+        start = time.perf_counter()
+        for transaction in spi_transactions([block]):
+            decode_transaction(*transaction)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    frames = time_decode(synth.stream(transactions), repeat)
+    print("\nRaw digital front end: {} transitions, {} transactions".format(len(rows), len(transactions)))
+    print("  {:>12,.0f} transactions/s  {:>8.2f} us/transaction  ({:.1f}x the SPI analyzer frame path)".format(
+        len(transactions) / best, 1e6 * best / len(transactions), frames / best))
+
+def bench_opcodes(repeat: int):
+    samples = synth.opcode_samples()
+    print("\nPer-opcode cost (all packet types, variable-length opcodes include long transfers)")
+    print("  {:<6} {:<26} {:>8} {:>12}".format("opcode", "command", "samples", "us/transaction"))
+    for opcode in sorted(COMMANDS):
+        transactions = [(mosi, miso) for _, mosi, miso in samples if mosi[0] == opcode]
+        frames = synth.stream(transactions)
+        elapsed = time_decode(frames, repeat)
+        print("  0x{:02X}   {:<26} {:>8} {:>12.2f}".format(opcode, COMMANDS[opcode].name, len(transactions), 1e6 * elapsed / len(transactions)))
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the SX128x in HLA decoder")
+    parser.add_argument("--packets", type=int, default=20000, help="ExpressLRS packets in the throughput stream")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs, the best one is reported")
+    parser.add_argument("--tolerance", type=float, default=5.0,
+                        help="percent the decoder may be slower than the reference decoder before the benchmark fails")
+    parser.add_argument("--update-golden", action="store_true", help="rewrite the golden corpus from the current decoder")
+    parser.add_argument("--golden-only", action="store_true", help="only check the golden corpus")
+    args = parser.parse_args(argv)
+
+    if not check_golden(args.update_golden):
+        return 1
+    if args.update_golden:
+        return 0
+    if not check_replay():
+        return 1
+    if args.golden_only:
+        return 0
+    ok = bench_throughput(args.packets, args.repeat, args.tolerance)
+    bench_digital(args.packets, args.repeat)
+    bench_opcodes(args.repeat)
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+# Synthetic SPI frame streams for exercising the sx128x_in HLA outside of Logic 2.
+#
+# Transactions are emitted the way the Logic 2 SPI analyzer delivers them to an HLA:
+# an "enable" frame, one "result" frame per byte with single byte "mosi"/"miso" data, then "disable".
+
+import os
+import random
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+try:
+    import saleae.analyzers
+except ImportError:
+    sys.path.insert(0, os.path.join(ROOT, "stubs"))
+
+from saleae.analyzers import AnalyzerFrame
+from sx128x_in import COMMANDS, PacketType
+
+# Duration of one SPI byte at 8 MHz and the idle time between two transactions, in seconds
+BYTE_TIME = 1e-6
+GAP_TIME = 5e-6
+
+# Argument byte values that hit the entries of the decoder lookup tables as well as invalid ones
+INTERESTING_BYTES = (
+    0x00, 0x01, 0x02, 0x03, 0x04, 0x05, 0x07, 0x0A, 0x0F, 0x10, 0x18, 0x20, 0x26, 0x28, 0x34, 0x40, 0x45,
+    0x4C, 0x50, 0x60, 0x69, 0x70, 0x80, 0x86, 0x8D, 0x90, 0xA0, 0xAA, 0xB0, 0xB1, 0xC0, 0xC7, 0xCE, 0xE0,
+    0xEB, 0xEF, 0xFF,
+)
+
+# Opcodes followed by a variable number of data bytes
+VARIABLE_LENGTH_OPCODES = (0x18, 0x19, 0x1A, 0x1B)
+
+def transaction_frames(mosi: bytes, miso: bytes, t: float) -> list:
+    """Frames of one CS-framed transaction starting at capture time t."""
+    frames = [AnalyzerFrame("enable", t, t)]
+    for i in range(len(mosi)):
+        start = t + i * BYTE_TIME
+        frames.append(AnalyzerFrame("result", start, start + BYTE_TIME, { "mosi": mosi[i:i + 1], "miso": miso[i:i + 1] }))
+    end = t + len(mosi) * BYTE_TIME
+    frames.append(AnalyzerFrame("disable", end, end))
+    return frames
+
+def stream(transactions, gap: float = GAP_TIME) -> list:
+    """Frames for a sequence of (mosi, miso) transactions, laid out back to back in capture time
+    with gap seconds between them."""
+    frames = []
+    t = 0.0
+    for mosi, miso in transactions:
+        frames += transaction_frames(mosi, miso, t)
+        t += len(mosi) * BYTE_TIME + gap
+    return frames
+
+def export_lines(frames) -> list:
+    """Lines of the Logic 2 SPI analyzer CSV export of frames, header first, as sx128x_replay reads them."""
+    lines = ["name,type,start_time,duration,mosi,miso\n"]
+    for frame in frames:
+        mosi = " ".join("0x%02X" % b for b in frame.data.get("mosi", b""))
+        miso = " ".join("0x%02X" % b for b in frame.data.get("miso", b""))
+        lines.append("SPI,%s,%.9f,%.9f,%s,%s\n" % (frame.type, frame.start_time, frame.end_time - frame.start_time, mosi, miso))
+    return lines
+
+def digital_rows(transactions) -> list:
+    """(time, cs, sck, mosi, miso) transitions of a raw digital export of the same transactions as stream(), SPI mode 0.
+
+    The first row holds the idle levels, data changes with the falling clock edge (or CS for the first bit)."""
+    rows = [(0.0, 1, 0, 0, 0)]
+    half = BYTE_TIME / 16
+    t = 0.0
+    for mosi, miso in transactions:
+        rows.append((t, 0, 0, 0, 0))
+        for i in range(len(mosi)):
+            for bit in range(7, -1, -1):
+                start = t + (i * 8 + (7 - bit)) * 2 * half
+                levels = ((mosi[i] >> bit) & 1, (miso[i] >> bit) & 1)
+                rows.append((start, 0, 0) + levels)
+                rows.append((start + half, 0, 1) + levels)
+        end = t + len(mosi) * BYTE_TIME
+        rows.append((end, 1, 0, 0, 0))
+        t = end + GAP_TIME
+    return rows
+
+def opcode_samples(count: int = 4, seed: int = 1) -> list:
+    """(packetType, mosi, miso) samples covering every registered opcode in every packet type."""
+    rng = random.Random(seed)
+    samples = []
+    for opcode in sorted(COMMANDS):
+        cmd = COMMANDS[opcode]
+        minLength = max(cmd.mosiLen, cmd.misoLen)
+        lengths = [minLength]
+        if opcode in VARIABLE_LENGTH_OPCODES:
+            lengths += [minLength + 1, 16, 64, 258]
+        for packetType in PacketType:
+            for length in lengths:
+                # A single long transfer per packet type is enough to cover the bulk data paths
+                for _ in range(count if length <= 16 else 1):
+                    mosi = bytes([opcode] + [rng.choice(INTERESTING_BYTES) for _ in range(length - 1)])
+                    miso = bytes(rng.choice(INTERESTING_BYTES) for _ in range(length))
+                    samples.append((packetType, mosi, miso))
+    return samples
+
+def irq_status(irq: int) -> tuple:
+    return bytes([0x15, 0x00, 0x00, 0x00]), bytes([0x52, 0x52, irq >> 8, irq & 0xFF])
+
+def elrs_traffic(packets: int, seed: int = 1) -> list:
+    """(mosi, miso) transactions resembling an ExpressLRS LoRa link: a hop, one 8 byte OTA packet
+    sent or received per slot, and a busy GetStatus/GetIrqStatus polling loop in between."""
+    rng = random.Random(seed)
+    status = bytes([0x52])
+    transactions = [
+        (bytes([0x80, 0x00]), status * 2),
+        (bytes([0x8A, 0x01]), status * 2),
+        (bytes([0x8B, 0x70, 0x18, 0x01]), status * 4),
+        (bytes([0x8C, 0x0C, 0x80, 0x08, 0x00, 0x40, 0x00, 0x00]), status * 8),
+        (bytes([0x8E, 0x1F, 0xE0]), status * 3),
+        (bytes([0x8D, 0x40, 0x23, 0x40, 0x23, 0x00, 0x00, 0x00, 0x00]), status * 9),
+    ]
+    # 80 channel FHSS table over 2400..2480 MHz, PLL step = 52 MHz / 2^18
+    channels = [round((2400.4e6 + 1e6 * c) * (1 << 18) / 52e6) for c in range(80)]
+    for n in range(packets):
+        step = channels[rng.randrange(len(channels))]
+        transactions.append((bytes([0x86, step >> 16, (step >> 8) & 0xFF, step & 0xFF]), status * 4))
+        polls = rng.randint(5, 40)
+        if n % 2 == 0:
+            payload = bytes(rng.randrange(256) for _ in range(8))
+            transactions.append((bytes([0x1A, 0x00]) + payload, status * 10))
+            transactions.append((bytes([0x83, 0x02, 0x00, 0x00]), status * 4))
+            for _ in range(polls):
+                transactions.append((bytes([0xC0]), bytes([0x6C])))
+                transactions.append(irq_status(0x0000))
+            transactions.append(irq_status(0x0001))
+        else:
+            transactions.append((bytes([0x82, 0x02, 0x01, 0xF4]), status * 4))
+            for _ in range(polls):
+                transactions.append(irq_status(0x0000))
+                transactions.append((bytes([0x1F, 0x00, 0x00]), bytes([0x52, 0x52, rng.randint(40, 200)])))
+            transactions.append(irq_status(0x0002))
+            transactions.append((bytes([0x17, 0x00, 0x00, 0x00]), bytes([0x52, 0x52, 0x08, 0x80])))
+            payload = bytes(rng.randrange(256) for _ in range(8))
+            transactions.append((bytes([0x1B, 0x80, 0x00]) + bytes(8), status * 3 + payload))
+            transactions.append((bytes([0x1D, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00]), bytes([0x52, 0x52, rng.randint(40, 200), rng.randint(0, 40), 0x00, 0x00, 0x00])))
+        transactions.append((bytes([0x97, 0xFF, 0xFF]), status * 3))
+    return transactions
+
+def ranging_traffic(exchanges: int, seed: int = 1) -> list:
+    """(mosi, miso) transactions of a ranging master: SF7/1625 kHz ranging setup, then per exchange a
+    SetTx, IRQ polling and a raw RangingResult read. The distance is about 20 m for the first half of
+    the exchanges and about 45 m for the second half, with an occasional far off result."""
+    rng = random.Random(seed)
+    status = bytes([0x52])
+    transactions = [
+        (bytes([0x80, 0x00]), status * 2),
+        (bytes([0x8A, 0x02]), status * 2),
+        (bytes([0x8B, 0x70, 0x0A, 0x01]), status * 4),
+        (bytes([0x8C, 0x0C, 0x00, 0x10, 0x20, 0x40, 0x00, 0x00]), status * 8),
+        (bytes([0xA3, 0x01]), status * 2),
+        # RangingResultMux = raw results
+        (bytes([0x18, 0x09, 0x24, 0x00]), status * 4),
+    ]
+    # Raw result LSB in meters at 1625 kHz: 150 / (2^12 * 1.6 MHz)
+    meters = 150 / (4096 * 1.6)
+    for n in range(exchanges):
+        distance = 20.0 if n < exchanges // 2 else 45.0
+        distance += rng.gauss(0.0, 0.5)
+        if rng.random() < 0.05:
+            distance += rng.choice((-1, 1)) * rng.uniform(50.0, 100.0)
+        value = round(distance / meters) & 0xFFFFFF
+        transactions.append((bytes([0x83, 0x02, 0x00, 0x00]), status * 4))
+        for _ in range(rng.randint(1, 4)):
+            transactions.append(irq_status(0x0000))
+        transactions.append(irq_status(0x0200))
+        transactions.append((bytes([0x19, 0x09, 0x61, 0x00, 0x00, 0x00, 0x00]),
+                             status * 4 + bytes([value >> 16, (value >> 8) & 0xFF, value & 0xFF])))
+        transactions.append((bytes([0x97, 0xFF, 0xFF]), status * 3))
+    return transactions
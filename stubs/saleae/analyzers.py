@@ -0,0 +1,46 @@
+# Minimal stand-in for the saleae.analyzers module that Logic 2 provides to extensions.
+# Only used when sx128x_in is driven outside of Logic 2 (offline replay), never loaded by Logic 2 itself.
+
+class AnalyzerFrame:
+    def __init__(self, type, start_time, end_time, data=None):
+        self.type = type
+        self.start_time = start_time
+        self.end_time = end_time
+        self.data = data if data is not None else {}
+
+class StringSetting:
+    def __init__(self, label=''):
+        self.label = label
+
+    def default(self):
+        return ''
+
+class NumberSetting:
+    def __init__(self, label='', min_value=None, max_value=None):
+        self.label = label
+        self.min_value = min_value
+        self.max_value = max_value
+
+    def default(self):
+        return float(self.min_value) if self.min_value is not None else 0.0
+
+class ChoicesSetting:
+    def __init__(self, choices, label=''):
+        self.choices = choices
+        self.label = label
+
+    def default(self):
+        return self.choices[0]
+
+class HighLevelAnalyzer:
+    result_types = {}
+
+    def __new__(cls, *args, **kwargs):
+        # Logic 2 sets every setting as an instance attribute holding the chosen value before __init__ runs,
+        # do the same with the value the settings dialog starts out with
+        self = super().__new__(cls)
+        for name in dir(cls):
+            setting = getattr(cls, name)
+            if isinstance(setting, (StringSetting, NumberSetting, ChoicesSetting)):
+                setattr(self, name, setting.default())
+        return self
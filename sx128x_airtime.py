@@ -0,0 +1,104 @@
+# Expected time on air of a transmitted packet from the last SetModulationParams/SetPacketParams.
+#
+# The same few radio configurations are used for millions of SetTx in a capture, so results are
+# memoized on the (hashable) parameter tuple. All times are in microseconds.
+
+import math
+from functools import lru_cache
+
+# LoRa coding rate -> CR in 4/(4+CR). The long interleaving rates (*) are approximated by their
+# plain counterpart, their interleaver adds a few symbols depending on the payload length.
+LORA_CR = { "4/5": 1, "4/6": 2, "4/7": 3, "4/8": 4, "4/5*": 1, "4/6*": 2, "4/8*": 4 }
+
+# FLRC coding rate -> code rate
+FLRC_CR = { "1/2": 0.5, "3/4": 0.75, "1": 1.0 }
+
+# LoRa packetParam2 header type / packetParam4 CRC
+LORA_IMPLICIT_HEADER = 0x80
+LORA_CRC_ENABLE = 0x20
+
+# GFSK/FLRC packetParam4 header type
+VARIABLE_LENGTH = 0x20
+
+# BLE: 1 byte preamble, 4 byte access address, 3 byte CRC
+BLE_PREAMBLE_BITS = 8
+BLE_ACCESS_ADDRESS_BITS = 32
+BLE_CRC_BITS = 24
+
+# FLRC tail bits appended before the encoder
+FLRC_TAIL_BITS = 6
+
+@lru_cache(maxsize=256)
+def time_on_air(packetType: str, modulation: tuple, packetParams: tuple, txLength: int):
+    """(time on air, preamble duration, symbol time) in us, None if a parameter is invalid.
+
+    modulation holds the decoded SetModulationParams values of packetType, packetParams the raw
+    SetPacketParams bytes. txLength (the WriteBuffer payload) is only used for BLE, whose length
+    is part of the PDU instead of the packet parameters."""
+    if packetType == "LORA" or packetType == "RANGING":
+        return lora_time_on_air(modulation, packetParams)
+    if packetType == "GFSK":
+        return gfsk_time_on_air(modulation, packetParams)
+    if packetType == "FLRC":
+        return flrc_time_on_air(modulation, packetParams)
+    if packetType == "BLE":
+        return ble_time_on_air(modulation, packetParams, txLength)
+    return None
+
+def lora_time_on_air(modulation, packetParams):
+    # SX1280 datasheet, LoRa time-on-air
+    sf, bandwidth, codingRate = modulation
+    if sf == "ERROR" or bandwidth == "ERROR" or codingRate not in LORA_CR:
+        return None
+    cr = LORA_CR[codingRate]
+    preambleSymbols = (packetParams[0] & 0x0F) << (packetParams[0] >> 4)
+    header = 0 if packetParams[1] == LORA_IMPLICIT_HEADER else 20
+    payloadLength = packetParams[2]
+    crc = 16 if packetParams[3] & LORA_CRC_ENABLE else 0
+
+    symbolTime = (1 << sf) * 1000 / bandwidth
+    if sf < 7:
+        preamble = preambleSymbols + 6.25
+        bits = 8*payloadLength + crc - 4*sf + header
+        payloadSymbols = 8 + math.ceil(max(bits, 0) / (4*sf)) * (cr + 4)
+    else:
+        preamble = preambleSymbols + 4.25
+        bits = 8*payloadLength + crc - 4*sf + 8 + header
+        payloadSymbols = 8 + math.ceil(max(bits, 0) / (4*(sf if sf <= 10 else sf - 2))) * (cr + 4)
+    return round((preamble + payloadSymbols) * symbolTime, 1), round(preamble * symbolTime, 1), round(symbolTime, 3)
+
+def gfsk_time_on_air(modulation, packetParams):
+    bitrate = modulation[0]
+    if bitrate == "ERROR":
+        return None
+    preambleBits = ((packetParams[0] >> 4) + 1) * 4
+    syncWordBits = ((packetParams[1] >> 1) + 1) * 8
+    header = 8 if packetParams[3] == VARIABLE_LENGTH else 0
+    payloadLength = packetParams[4]
+    crc = (packetParams[5] >> 4) * 8
+
+    bits = preambleBits + syncWordBits + header + 8*payloadLength + crc
+    return round(bits / bitrate, 1), round(preambleBits / bitrate, 1), round(1 / bitrate, 3)
+
+def flrc_time_on_air(modulation, packetParams):
+    bitrate, _, codingRate, _ = modulation
+    if bitrate == "ERROR" or codingRate not in FLRC_CR:
+        return None
+    preambleBits = ((packetParams[0] >> 4) + 1) * 4
+    syncWordBits = 32 if packetParams[1] else 0
+    header = 16 if packetParams[3] == VARIABLE_LENGTH else 0
+    payloadLength = packetParams[4]
+    crc = ((packetParams[5] >> 4) + 1) * 8 if packetParams[5] else 0
+
+    # Header, payload and CRC go through the FLRC encoder, preamble and sync word do not
+    coded = (header + 8*payloadLength + crc + FLRC_TAIL_BITS) / FLRC_CR[codingRate]
+    bits = preambleBits + syncWordBits + math.ceil(coded)
+    return round(bits / bitrate, 1), round(preambleBits / bitrate, 1), round(1 / bitrate, 3)
+
+def ble_time_on_air(modulation, packetParams, txLength):
+    bitrate = modulation[0]
+    if bitrate == "ERROR":
+        return None
+    crc = BLE_CRC_BITS if packetParams[1] else 0
+    bits = BLE_PREAMBLE_BITS + BLE_ACCESS_ADDRESS_BITS + 8*txLength + crc
+    return round(bits / bitrate, 1), round(BLE_PREAMBLE_BITS / bitrate, 1), round(1 / bitrate, 3)
@@ -0,0 +1,111 @@
+# SPI bus utilization and transaction timing, summarized per window of capture time.
+#
+# A window is closed by the first transaction that starts after it, so the summary frame spans
+# from the first transaction of the window to the end of its last one. Per opcode bus time is
+# kept for the window (top opcodes in the frame) and for the whole capture (printed by finish()).
+
+# Number of opcodes named in a window summary frame
+TOP_OPCODES = 3
+
+class OpcodeTime:
+    __slots__ = ("count", "busy", "bytes")
+
+    def __init__(self):
+        self.count = 0
+        self.busy = 0.0
+        self.bytes = 0
+
+class BusStats:
+    result_types = {
+        "BusStats": {
+            "format": "SPI bus: {{data.transactions}} transactions, {{data.utilization}}% busy, {{data.throughput}} kB/s, duration avg {{data.durationAvg}} us max {{data.durationMax}} us, gap min {{data.gapMin}} us avg {{data.gapAvg}} us, top {{data.topOpcodes}}"
+        },
+    }
+
+    def __init__(self, window: float):
+        # Window length in seconds of capture time
+        self.window = window
+        self.windowStart = None
+        self.lastEnd = None
+        self.totals = {}
+        self.clear()
+
+    def clear(self):
+        self.transactions = 0
+        self.busy = 0.0
+        self.bytes = 0
+        self.durationMax = 0.0
+        self.gaps = 0
+        self.gapTotal = 0.0
+        self.gapMin = None
+        self.opcodes = {}
+
+    def update(self, start, end, length: int, name: str):
+        """Feed one transaction, returns (result type, start, end, data) when it closes a window."""
+        summary = None
+        if self.windowStart is None:
+            self.windowStart = start
+        else:
+            elapsed = float(start - self.windowStart)
+            if elapsed >= self.window:
+                summary = self.summary(elapsed)
+                self.clear()
+                self.windowStart = start
+            gap = float(start - self.lastEnd)
+            self.gaps += 1
+            self.gapTotal += gap
+            if self.gapMin is None or gap < self.gapMin:
+                self.gapMin = gap
+
+        duration = float(end - start)
+        self.transactions += 1
+        self.busy += duration
+        self.bytes += length
+        if duration > self.durationMax:
+            self.durationMax = duration
+        opcode = self.opcodes.get(name)
+        if opcode is None:
+            opcode = self.opcodes[name] = OpcodeTime()
+        opcode.count += 1
+        opcode.busy += duration
+        opcode.bytes += length
+        self.lastEnd = end
+        return summary
+
+    def summary(self, elapsed: float):
+        # elapsed runs up to the start of the transaction after the window, so trailing idle time counts
+        top = sorted(self.opcodes.items(), key=lambda item: -item[1].busy)[:TOP_OPCODES]
+        for name, opcode in self.opcodes.items():
+            total = self.totals.get(name)
+            if total is None:
+                total = self.totals[name] = OpcodeTime()
+            total.count += opcode.count
+            total.busy += opcode.busy
+            total.bytes += opcode.bytes
+        return ("BusStats", self.windowStart, self.lastEnd, {
+            "transactions": self.transactions,
+            "bytes": self.bytes,
+            "utilization": round(self.busy / elapsed * 100, 1),
+            "throughput": round(self.bytes / elapsed / 1000, 1),
+            "durationAvg": round(self.busy / self.transactions * 1e6, 1),
+            "durationMax": round(self.durationMax * 1e6, 1),
+            "gapMin": round(self.gapMin * 1e6, 1) if self.gapMin is not None else "n/a",
+            "gapAvg": round(self.gapTotal / self.gaps * 1e6, 1) if self.gaps else "n/a",
+            "topOpcodes": ", ".join("{} {}%".format(name, round(opcode.busy / self.busy * 100 if self.busy else 0.0, 1)) for name, opcode in top),
+        })
+
+    def report(self):
+        # Whole capture per opcode bus time, windows closed so far plus the open one
+        totals = {}
+        for source in (self.totals, self.opcodes):
+            for name, opcode in source.items():
+                total = totals.setdefault(name, [0, 0.0, 0])
+                total[0] += opcode.count
+                total[1] += opcode.busy
+                total[2] += opcode.bytes
+        busy = sum(total[1] for total in totals.values())
+        lines = []
+        for name, (count, opcodeBusy, length) in sorted(totals.items(), key=lambda item: -item[1][1]):
+            lines.append("SPI bus {}: {} transactions, {} bytes, {:.1f} us busy ({:.1f}%)".format(
+                name, count, length, opcodeBusy * 1e6, opcodeBusy / busy * 100 if busy else 0.0))
+        return lines
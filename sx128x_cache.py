@@ -0,0 +1,52 @@
+# Bounded LRU cache of decoded transactions, in front of the command decoders.
+#
+# Polling and hopping traffic repeats the same few transactions over and over. A transaction is
+# keyed on its raw MOSI/MISO bytes and the packet type it is decoded with, a hit returns the
+# (result type, data) built the first time. The packet type is compared on the entry instead of
+# being hashed into the key, hashing an Enum member runs Python code on every lookup; an entry
+# decoded with another packet type is a miss and gets replaced. Only commands flagged as cacheable in the registry are
+# looked up: their decoders depend on nothing but the key, and the analyzer state they change is
+# reapplied by the command's replay function on every hit.
+
+from collections import OrderedDict
+
+class DecodeCache:
+    def __init__(self, size: int):
+        self.size = size
+        # (MOSI bytes, MISO bytes) -> (packet type, result type, data), least recently used first
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple, packetType):
+        """Cached (result type, data) of key decoded with packetType, None on a miss."""
+        entry = self.entries.get(key)
+        if entry is None or entry[0] is not packetType:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1], entry[2]
+
+    def put(self, key: tuple, packetType, resultType: str, data: dict):
+        self.entries[key] = (packetType, resultType, data)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def counters(self) -> tuple:
+        """(hits, misses, entries), what merged_summary() needs from every shard of an offline replay."""
+        return self.hits, self.misses, len(self.entries)
+
+    def summary(self):
+        return merged_summary([self.counters()], self.size)
+
+def merged_summary(counters: list, size: int) -> list:
+    """Summary of the caches with these counters(), the entries are those of the fullest cache."""
+    hits = sum(c[0] for c in counters)
+    misses = sum(c[1] for c in counters)
+    lookups = hits + misses
+    if lookups == 0:
+        return []
+    return ["Decode cache: {} hits, {} misses ({:.1f}% hit rate), {}/{} entries".format(
+        hits, misses, hits / lookups * 100, max(c[2] for c in counters), size)]
@@ -0,0 +1,203 @@
+# Offline decoding of Logic 2 raw digital exports of the CS/SCK/MOSI/MISO channels, without the SPI analyzer.
+#
+# Usage: python sx128x_digital.py digital.csv -o decoded.csv [--cs 0 --sck 1 --mosi 2 --miso 3] [--cpol 0 --cpha 0] [-s NAME=VALUE]...
+#        python sx128x_digital.py cs.bin sck.bin mosi.bin miso.bin -o decoded.csv [...]
+#
+# The input is either the CSV of "Export Raw Data" (a "Time [s]" column plus one column per channel,
+# one row per transition) or the four binary per channel files of the binary raw export, in
+# CS, SCK, MOSI, MISO order. Both are read in blocks of rows. CS and sampling clock edges are found
+# with NumPy array operations, the bits of every complete transaction in a block are packed into
+# bytes at once, and the transactions go straight to sx128x_in.decode_transaction(), so no per byte
+# AnalyzerFrame is ever built. A transaction still open at the end of a block is carried over to the
+# next one. CS is active low, bytes are MSB first; SPI mode 0 (the SX128x mode) unless --cpol/--cpha.
+#
+# NumPy is only needed by this front end, sx128x_in and the replay of SPI analyzer exports do not use it.
+
+import argparse
+import contextlib
+import csv
+import sys
+from itertools import islice
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from sx128x_replay import create_analyzer, results, render
+
+# Rows per block read from the CSV, and SCK transitions per block read from the binary files
+CSV_BLOCK_ROWS = 1 << 20
+BINARY_BLOCK_TRANSITIONS = 1 << 22
+
+# Binary raw export of one digital channel: identifier, version, type, initial state, begin/end time, transition count
+BINARY_IDENTIFIER = b"<SALEAE>"
+BINARY_DIGITAL_TYPE = 0
+
+def spi_block(times, cs, sck, mosi, miso, previous: tuple, cpol: int, cpha: int):
+    """Complete transactions of a block of rows as arrays.
+
+    Rows hold the time and the channel levels after a transition, previous is the (CS, SCK) levels
+    before the first row. Returns (starts, ends, offsets, mosi bytes, miso bytes, rest): the bytes of
+    transaction i are [offsets[i], offsets[i + 1]), rest is the first row of a transaction that is
+    still open at the end of the block (the number of rows when there is none)."""
+    # 0/1 levels with the level before the block in front, the differences are -1 on falling and 1 on rising edges
+    csLevels = np.concatenate(([previous[0] != 0], cs != 0)).view(np.int8)
+    csEdges = np.diff(csLevels)
+    sckEdges = np.diff(np.concatenate(([previous[1] != 0], sck != 0)).view(np.int8))
+    enables = np.flatnonzero(csEdges == -1)
+    disables = np.flatnonzero(csEdges == 1)
+    # CS low before the first enable is the tail of a transaction the capture missed
+    if len(enables) > 0:
+        disables = disables[np.searchsorted(disables, enables[0]):]
+    else:
+        disables = disables[:0]
+    count = len(disables)
+    rest = int(enables[count]) if len(enables) > count else len(times)
+    enables = enables[:count]
+
+    # Data is sampled on rising clock edges in modes 0 and 3, on falling ones in modes 1 and 2
+    edges = np.flatnonzero((sckEdges == (1 if cpol == cpha else -1)) & (csLevels[1:] == 0))
+    # Whole bytes only, the bits of a byte cut short by CS are dropped like the SPI analyzer does
+    first = np.searchsorted(edges, enables)
+    lengths = (np.searchsorted(edges, disables) - first) // 8
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+    # Sampling rows of every kept bit, transaction after transaction
+    bits = edges[np.arange(offsets[-1] * 8) + np.repeat(first - offsets[:-1] * 8, lengths * 8)]
+    return (times[enables], times[disables], offsets,
+            np.packbits(mosi[bits] != 0), np.packbits(miso[bits] != 0), rest)
+
+def spi_transactions(blocks, cpol: int = 0, cpha: int = 0):
+    """Yield (start, end, mosi, miso) for every complete transaction of a stream of (times, cs, sck, mosi, miso) blocks."""
+    previous = None
+    pending = None
+    for block in blocks:
+        if pending is not None:
+            block = tuple(np.concatenate((carried, rows)) for carried, rows in zip(pending, block))
+        times, cs, sck = block[0], block[1], block[2]
+        if len(times) == 0:
+            continue
+        if previous is None:
+            # The first row holds the levels the capture starts with
+            previous = (cs[0], sck[0])
+        starts, ends, offsets, mosi, miso, rest = spi_block(*block, previous, cpol, cpha)
+        # Slicing bytes is cheaper than slicing the arrays for every transaction
+        offsets = offsets.tolist()
+        mosi = mosi.tobytes()
+        miso = miso.tobytes()
+        for i, (start, end) in enumerate(zip(starts.tolist(), ends.tolist())):
+            yield start, end, mosi[offsets[i]:offsets[i + 1]], miso[offsets[i]:offsets[i + 1]]
+        if rest < len(times):
+            pending = tuple(rows[rest:] for rows in block)
+            if rest > 0:
+                previous = (cs[rest - 1], sck[rest - 1])
+        else:
+            pending = None
+            previous = (cs[-1], sck[-1])
+
+def channel_column(header: list, channel: str) -> int:
+    # Channels are given by column name or by number, "2" is the "Channel 2" column or else the third channel column
+    names = [name.strip() for name in header]
+    for name in (channel, "Channel " + channel):
+        if name in names:
+            return names.index(name)
+    if channel.isdigit() and 1 + int(channel) < len(names):
+        return 1 + int(channel)
+    raise ValueError("No channel {} in the export, columns: {}".format(channel, ", ".join(names)))
+
+def read_csv_blocks(path: str, channels: tuple, blockRows: int = CSV_BLOCK_ROWS):
+    """Yield (times, cs, sck, mosi, miso) blocks of a raw digital CSV export, channels are the CS, SCK, MOSI, MISO columns."""
+    with open(path) as f:
+        header = next(csv.reader([f.readline()]))
+        columns = [0] + [channel_column(header, channel) for channel in channels]
+        while True:
+            lines = list(islice(f, blockRows))
+            if not lines:
+                break
+            rows = np.loadtxt(lines, delimiter=",", usecols=columns, ndmin=2)
+            yield (rows[:, 0],) + tuple(rows[:, i].astype(np.uint8) for i in range(1, 5))
+
+def read_binary_channel(path: str):
+    """(initial level, begin time, transition times) of one channel of the binary raw export, the times are memory mapped."""
+    header = np.dtype([("identifier", "S8"), ("version", "<i4"), ("type", "<i4"), ("initial", "<u4"),
+                       ("begin", "<f8"), ("end", "<f8"), ("transitions", "<u8")])
+    fields = np.fromfile(path, dtype=header, count=1)
+    if len(fields) == 0 or fields["identifier"][0] != BINARY_IDENTIFIER or fields["type"][0] != BINARY_DIGITAL_TYPE:
+        raise ValueError("{} is not a Logic 2 binary digital export".format(path))
+    transitions = np.memmap(path, dtype="<f8", mode="r", offset=header.itemsize, shape=(int(fields["transitions"][0]),))
+    return int(fields["initial"][0]), float(fields["begin"][0]), transitions
+
+def read_binary_blocks(paths: tuple, blockTransitions: int = BINARY_BLOCK_TRANSITIONS):
+    """Yield (times, cs, sck, mosi, miso) blocks merged from the CS, SCK, MOSI, MISO binary exports."""
+    channels = [read_binary_channel(path) for path in paths]
+    begin = min(channel[1] for channel in channels)
+    # The first row holds the initial levels, like the CSV export
+    yield (np.array([begin]),) + tuple(np.array([channel[0]], dtype=np.uint8) for channel in channels)
+    # Blocks end after every blockTransitions SCK transitions, the other channels are cut at the same times
+    sckTransitions = channels[1][2]
+    limits = [float(sckTransitions[i]) for i in range(blockTransitions, len(sckTransitions), blockTransitions)]
+    done = [0] * len(channels)
+    for limit in limits + [None]:
+        windows = []
+        for index, (initial, _, transitions) in enumerate(channels):
+            last = len(transitions) if limit is None else int(np.searchsorted(transitions, limit))
+            windows.append((initial + done[index], np.asarray(transitions[done[index]:last])))
+            done[index] = last
+        times = np.unique(np.concatenate([window for _, window in windows]))
+        if len(times) == 0:
+            continue
+        # Level after every row: the initial level flipped once per transition up to and including the row
+        levels = tuple(((base + np.searchsorted(window, times, side="right")) & 1).astype(np.uint8) for base, window in windows)
+        yield (times,) + levels
+
+def decode(blocks, output, settings: dict, cpol: int, cpha: int) -> int:
+    analyzer = create_analyzer(settings)
+    writer = csv.writer(output)
+    writer.writerow(("start_time", "end_time", "type", "decoded"))
+    count = 0
+    for start, end, mosi, miso in spi_transactions(blocks, cpol, cpha):
+        for result in results(analyzer.decode_transaction(start, end, mosi, miso)):
+            writer.writerow((repr(result.start_time), repr(result.end_time), result.type, render(result)))
+        count += 1
+    result = analyzer.flush()
+    if result is not None:
+        writer.writerow((repr(result.start_time), repr(result.end_time), result.type, render(result)))
+    analyzer.finish()
+    return count
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Decode a Logic 2 raw digital export of an SX128x SPI bus")
+    parser.add_argument("input", nargs="+", help="raw digital CSV export, or the CS, SCK, MOSI, MISO binary exports")
+    parser.add_argument("-o", "--output", help="decoded CSV output (default: stdout)")
+    parser.add_argument("--cs", default="0", help="CSV column name or channel number of CS (default: 0)")
+    parser.add_argument("--sck", default="1", help="CSV column name or channel number of SCK (default: 1)")
+    parser.add_argument("--mosi", default="2", help="CSV column name or channel number of MOSI (default: 2)")
+    parser.add_argument("--miso", default="3", help="CSV column name or channel number of MISO (default: 3)")
+    parser.add_argument("--cpol", type=int, choices=(0, 1), default=0, help="clock polarity (default: 0)")
+    parser.add_argument("--cpha", type=int, choices=(0, 1), default=0, help="clock phase (default: 0)")
+    parser.add_argument("-s", "--setting", action="append", default=[], metavar="NAME=VALUE",
+                        help="analyzer setting, e.g. packet_frames='Packets only' (repeatable)")
+    args = parser.parse_args(argv)
+
+    if np is None:
+        print("sx128x_digital needs NumPy: pip install numpy", file=sys.stderr)
+        return 1
+    if len(args.input) == 4:
+        blocks = read_binary_blocks(tuple(args.input))
+    elif len(args.input) == 1:
+        blocks = read_csv_blocks(args.input[0], (args.cs, args.sck, args.mosi, args.miso))
+    else:
+        parser.error("expected one CSV export or four binary exports (CS, SCK, MOSI, MISO)")
+    settings = dict(setting.split("=", 1) for setting in args.setting)
+    # Keep diagnostics printed by the analyzer out of the decoded output when writing to stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        if args.output:
+            with open(args.output, "w", newline="") as output:
+                count = decode(blocks, output, settings, args.cpol, args.cpha)
+        else:
+            count = decode(blocks, sys.__stdout__, settings, args.cpol, args.cpha)
+    print("Decoded {} transactions".format(count), file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+# Append-only export of every decoded transaction, for analytics outside of Logic 2.
+#
+# Records are collected in memory and written in batches of EXPORT_BATCH_SIZE bytes. Every analyzer
+# instance appends a run, which starts with a header. Times are seconds relative to origin, the first
+# transaction of the run unless set before it (Logic 2 capture times are not serializable, the offline
+# replay sets it to the first row of the export for every shard).
+#
+# Binary file: per run EXPORT_MAGIC, uint32 length + JSON header {"resultTypes": [...]}, then one
+# record per transaction: EXPORT_RECORD (start, end, result type index, opcode, packet type, MOSI
+# length, MISO length) followed by the raw MOSI and MISO bytes. Decoded fields are not stored, they
+# follow from the raw bytes and the packet type. A record never starts with EXPORT_MAGIC, as a start
+# time those bytes are over 1e117 seconds.
+#
+# JSONL file: per run the header line {"resultTypes": [...]}, then one object per transaction with
+# the times, result type, opcode, packet type, raw bytes as hex strings and the decoded fields (bytes
+# fields as hex strings).
+
+import json
+import struct
+
+EXPORT_MAGIC = b"SX128XEX"
+EXPORT_HEADER = struct.Struct("<I")
+EXPORT_RECORD = struct.Struct("<ddHBBII")
+
+# Bytes of pending records that trigger a write
+EXPORT_BATCH_SIZE = 1 << 16
+
+class BinaryExport:
+    def __init__(self, path: str, resultTypes):
+        self.file = open(path, "ab")
+        self.resultTypes = { resultType: i for i, resultType in enumerate(resultTypes) }
+        header = json.dumps({ "resultTypes": list(resultTypes) }).encode()
+        self.file.write(EXPORT_MAGIC + EXPORT_HEADER.pack(len(header)) + header)
+        self.pending = bytearray()
+        self.origin = None
+
+    def write(self, start, end, resultType: str, packetType, mosi, miso, data: dict):
+        if self.origin is None:
+            self.origin = start
+        pending = self.pending
+        pending += EXPORT_RECORD.pack(
+            float(start - self.origin),
+            float(end - self.origin),
+            self.resultTypes[resultType],
+            mosi[0] if len(mosi) > 0 else 0,
+            packetType.value,
+            len(mosi),
+            len(miso),
+        )
+        pending += mosi
+        pending += miso
+        if len(pending) >= EXPORT_BATCH_SIZE:
+            self.file.write(pending)
+            pending.clear()
+
+    def close(self):
+        self.file.write(self.pending)
+        self.pending.clear()
+        self.file.close()
+
+class JsonlExport:
+    def __init__(self, path: str, resultTypes):
+        self.file = open(path, "a")
+        self.pending = [json.dumps({ "resultTypes": list(resultTypes) })]
+        self.size = 0
+        self.origin = None
+
+    def write(self, start, end, resultType: str, packetType, mosi, miso, data: dict):
+        if self.origin is None:
+            self.origin = start
+        fields = {}
+        for key, value in data.items():
+            fields[key] = value.hex() if isinstance(value, bytes) else value
+        line = json.dumps({
+            "start": float(start - self.origin),
+            "end": float(end - self.origin),
+            "type": resultType,
+            "opcode": mosi[0] if len(mosi) > 0 else None,
+            "packetType": packetType.name,
+            "mosi": mosi.hex(),
+            "miso": miso.hex(),
+            "data": fields,
+        })
+        self.pending.append(line)
+        self.size += len(line)
+        if self.size >= EXPORT_BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.file.write("\n".join(self.pending) + "\n")
+            self.pending.clear()
+            self.size = 0
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+# "Export" setting choice -> sink class
+EXPORT_FORMATS = { "Binary": BinaryExport, "JSONL": JsonlExport }
+
+def read_binary(path: str):
+    """Yields (run, start, end, result type, opcode, packet type value, mosi, miso) from a binary export file.
+
+    Runs are numbered from 0 in file order, the times of every run are relative to its first transaction."""
+    with open(path, "rb") as f:
+        contents = f.read()
+    if not contents.startswith(EXPORT_MAGIC):
+        raise ValueError("{} is not an sx128x_in binary export".format(path))
+    run = -1
+    position = 0
+    while position < len(contents):
+        if contents.startswith(EXPORT_MAGIC, position):
+            position += len(EXPORT_MAGIC)
+            (length,) = EXPORT_HEADER.unpack_from(contents, position)
+            position += EXPORT_HEADER.size
+            resultTypes = json.loads(contents[position:position + length])["resultTypes"]
+            position += length
+            run += 1
+            continue
+        start, end, resultType, opcode, packetType, mosiLength, misoLength = EXPORT_RECORD.unpack_from(contents, position)
+        position += EXPORT_RECORD.size
+        mosi = contents[position:position + mosiLength]
+        position += mosiLength
+        miso = contents[position:position + misoLength]
+        position += misoLength
+        yield run, start, end, resultTypes[resultType], opcode, packetType, mosi, miso
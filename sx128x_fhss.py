@@ -0,0 +1,101 @@
+# Frequency hopping: SetRfFrequency PLL steps -> channel index of a channel plan, and hop statistics.
+#
+# Every channel of a plan is precomputed into a PLL step -> index dict. Hosts that round differently
+# or apply a frequency correction land a few steps off, those values are resolved once to the
+# nearest channel within half a channel spacing and added to the dict.
+
+import math
+from bisect import bisect_left
+
+XTAL_FREQUENCY = 52000000
+PLL_STEP_SHIFT = 18
+
+# Number of hops kept for the hop sequence trace printed by finish()
+HOP_TRACE_LENGTH = 128
+
+def ble_channels():
+    # BLE channel index order: data channels 0..36 skip the advertising frequencies 2402/2426/2480 MHz
+    frequencies = [2402000000 + 2000000*k for k in range(40)]
+    advertising = [frequencies[0], frequencies[12], frequencies[39]]
+    data = [f for f in frequencies if f not in advertising]
+    return tuple(data + advertising)
+
+# "Channel plan" setting choice -> channel frequencies in Hz by channel index
+CHANNEL_PLANS = {
+    "Off": None,
+    "ExpressLRS ISM 2.4 GHz (80 ch)": tuple(2400400000 + 1000000*n for n in range(80)),
+    "BLE (40 ch)": ble_channels(),
+}
+
+class ChannelMap:
+    def __init__(self, frequencies):
+        self.count = len(frequencies)
+        self.channels = {}
+        for index, frequency in enumerate(frequencies):
+            exact = frequency * (1 << PLL_STEP_SHIFT) / XTAL_FREQUENCY
+            # Truncating and rounding hosts both hit the table
+            self.channels[math.floor(exact)] = index
+            self.channels[round(exact)] = index
+        self.steps = sorted(self.channels)
+        spacing = min((b - a for a, b in zip(self.steps, self.steps[1:]) if b - a > 1), default=1 << PLL_STEP_SHIFT)
+        self.tolerance = spacing // 2
+
+    def channel(self, rfFrequency: int):
+        """Channel index of a SetRfFrequency value, None when it is not near any channel of the plan."""
+        index = self.channels.get(rfFrequency, -1)
+        if index != -1:
+            return index
+        i = bisect_left(self.steps, rfFrequency)
+        nearest = min(self.steps[max(i - 1, 0):i + 1], key=lambda steps: abs(steps - rfFrequency))
+        index = self.channels[nearest] if abs(nearest - rfFrequency) <= self.tolerance else None
+        self.channels[rfFrequency] = index
+        return index
+
+class HopStats:
+    def __init__(self, channelCount: int):
+        self.usage = [0] * channelCount
+        self.offPlan = 0
+        self.hops = 0
+        self.lastTime = None
+        self.intervalCount = 0
+        self.intervalTotal = 0.0
+        self.intervalSquares = 0.0
+        self.intervalMin = None
+        self.intervalMax = None
+        self.trace = []
+
+    def update(self, channel, time):
+        if channel is None:
+            self.offPlan += 1
+        else:
+            self.usage[channel] += 1
+        if len(self.trace) < HOP_TRACE_LENGTH:
+            self.trace.append("?" if channel is None else str(channel))
+        self.hops += 1
+        if self.lastTime is not None:
+            interval = float(time - self.lastTime) * 1e6
+            self.intervalCount += 1
+            self.intervalTotal += interval
+            self.intervalSquares += interval * interval
+            if self.intervalMin is None or interval < self.intervalMin:
+                self.intervalMin = interval
+            if self.intervalMax is None or interval > self.intervalMax:
+                self.intervalMax = interval
+        self.lastTime = time
+
+    def summary(self):
+        if self.hops == 0:
+            return []
+        used = sum(1 for count in self.usage if count)
+        unused = [str(channel) for channel, count in enumerate(self.usage) if count == 0]
+        lines = ["FHSS: {} hops, {}/{} channels used, {} off plan, per channel min {} max {}".format(
+            self.hops, used, len(self.usage), self.offPlan, min(self.usage), max(self.usage))]
+        if unused:
+            lines.append("FHSS unused channels: " + " ".join(unused))
+        if self.intervalCount:
+            mean = self.intervalTotal / self.intervalCount
+            jitter = math.sqrt(max(self.intervalSquares / self.intervalCount - mean * mean, 0.0))
+            lines.append("FHSS hop interval: min {:.1f} avg {:.1f} max {:.1f} us, jitter (std dev) {:.1f} us".format(
+                self.intervalMin, mean, self.intervalMax, jitter))
+        lines.append("FHSS hop sequence (first {}): {}".format(len(self.trace), " ".join(self.trace)))
+        return lines
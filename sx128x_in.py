@@ -1,5 +1,23 @@
+import os
+import tempfile
 from enum import Enum
-from saleae.analyzers import HighLevelAnalyzer, AnalyzerFrame
+from saleae.analyzers import HighLevelAnalyzer, AnalyzerFrame, ChoicesSetting, StringSetting
+from sx128x_shadow import ShadowModel
+from sx128x_packets import PacketTracker
+from sx128x_airtime import time_on_air
+from sx128x_irq import IrqLatency, irq_flags
+from sx128x_bus import BusStats
+from sx128x_profile import Profiler
+from sx128x_runs import RunCoalescer
+from sx128x_export import EXPORT_FORMATS
+from sx128x_modes import RadioModes
+from sx128x_registers import register_names
+from sx128x_ranging import RangingTracker
+from sx128x_traffic import TrafficCounters
+from sx128x_payloads import PAYLOAD_PROTOCOLS, PayloadDecoders
+from sx128x_fhss import CHANNEL_PLANS, XTAL_FREQUENCY, PLL_STEP_SHIFT, ChannelMap, HopStats
+from sx128x_cache import DecodeCache
+from sx128x_state import Checkpoints, load_snapshot
 
 class PacketType(Enum):
     GFSK = 0x00
@@ -9,21 +27,246 @@ class PacketType(Enum):
     BLE = 0x04
     UNDEFINED = 0xFF
 
+# Packet type byte (SetPacketType/GetPacketType) -> PacketType, reserved values are absent
+PACKET_TYPES = { t.value: t for t in PacketType if t != PacketType.UNDEFINED }
+
+# SetStandby standbyConfig
+STANDBY_CONFIGS = { 0x00: "RC", 0x01: "XOSC" }
+
+# SetRegulatorMode regulatorMode
+REGULATOR_MODES = { 0x00: "LDO", 0x01: "DC-DC" }
+
+# SetAdvancedRanging/SetLongPreamble/SetAutoFS enable
+ENABLE_STATES = { 0x00: "disable", 0x01: "enable" }
+
+# SetRangingRole role
+RANGING_ROLES = { 0x00: "Slave", 0x01: "Master" }
+
+# SetCadParams cadSymbolNum -> number of symbols
+CAD_SYMBOLS = { 0x00: 1, 0x20: 2, 0x40: 4, 0x60: 8, 0x80: 16 }
+
+# SetTxParams rampTime -> ramp time in us
+TX_RAMP_TIMES = { 0x00: 2, 0x20: 4, 0x40: 6, 0x60: 8, 0x80: 10, 0xA0: 12, 0xC0: 16, 0xE0: 20 }
+
+# SetModulationParams lookup tables, keyed by PacketType where the allowed values differ per modem
+
+# modParam1 = spreading factor (SF11 and SF12 not available for RANGING)
+_LORA_SF = { 0x50: 5, 0x60: 6, 0x70: 7, 0x80: 8, 0x90: 9, 0xA0: 10, 0xB0: 11, 0xC0: 12 }
+SPREADING_FACTORS = {
+    PacketType.LORA: _LORA_SF,
+    PacketType.RANGING: { k: v for k, v in _LORA_SF.items() if k <= 0xA0 },
+}
+
+# modParam2 = bandwidth in kHz (203.125 kHz not available for RANGING)
+_LORA_BW = { 0x0A: 1625.0, 0x18: 812.5, 0x26: 406.25, 0x34: 203.125 }
+LORA_BANDWIDTHS = {
+    PacketType.LORA: _LORA_BW,
+    PacketType.RANGING: { k: v for k, v in _LORA_BW.items() if k != 0x34 },
+}
+
+# modParam3 = coding rate (* = long interleaving)
+LORA_CODING_RATES = { 0x01: "4/5", 0x02: "4/6", 0x03: "4/7", 0x04: "4/8", 0x05: "4/5*", 0x06: "4/6*", 0x07: "4/8*" }
+
+# modParam1 = (bitrate in Mb/s, bandwidth in MHz)
+_GFSK_BR_BW = {
+    0x04: (2.0, 2.4),
+    0x28: (1.6, 2.4),
+    0x4C: (1.0, 2.4),
+    0x45: (1.0, 1.2),
+    0x70: (0.8, 2.4),
+    0x69: (0.8, 1.2),
+    0x8D: (0.5, 1.2),
+    0x86: (0.5, 0.6),
+    0xB1: (0.4, 1.2),
+    0xAA: (0.4, 0.6),
+    0xCE: (0.25, 0.6),
+    0xC7: (0.25, 0.3),
+    0xEF: (0.125, 0.3),
+}
+BITRATE_BANDWIDTHS = {
+    PacketType.GFSK: _GFSK_BR_BW,
+    PacketType.BLE: _GFSK_BR_BW,
+    PacketType.FLRC: {
+        0x45: (1.3, 1.2),
+        0x69: (1.04, 1.2),
+        0x86: (0.65, 0.6),
+        0xAA: (0.52, 0.6),
+        0xC7: (0.325, 0.3),
+        0xEB: (0.26, 0.3),
+    },
+}
+
+# GFSK/BLE modParam2 = modulation index
+GFSK_MODULATION_INDEXES = { v: 0.35 if v == 0 else 0.25 * (v + 1) for v in range(0x10) }
+
+# FLRC modParam2 = coding rate, every byte value is mapped (0x01 is the only invalid one)
+FLRC_CODING_RATES = { v: "Reserved" for v in range(0x100) }
+FLRC_CODING_RATES.update({ 0x00: "1/2", 0x01: "ERROR", 0x02: "3/4", 0x04: "1" })
+
+# GFSK/BLE/FLRC modParam3 = Gaussian filter BT
+BT_FILTERS = { 0x00: "No filtering", 0x10: "1", 0x20: "0.5" }
+
+# GetPacketStatus packetStatus[4] sync address detection
+SYNC_ADDRESS_RESULTS = { 0: "SyncAddrDetection Error", 1: "SyncAddr 1 detected", 2: "SyncAddr 2 detected", 3: "SyncAddr 3 detected" }
+
+# Status byte (first MISO byte of every command) bits 7:5 = circuit mode, bits 4:2 = command status
+CIRCUIT_MODES = { 2: "STDBY_RC", 3: "STDBY_XOSC", 4: "FS", 5: "RX", 6: "TX" }
+COMMAND_STATUSES = {
+    1: "Command processed",
+    2: "Data available",
+    3: "Command timeout",
+    4: "Command processing error",
+    5: "Command execution failure",
+    6: "TX done",
+}
+
+# Status byte value -> (circuit mode, command status)
+STATUS_FIELDS = tuple(
+    (CIRCUIT_MODES.get(b >> 5, "Reserved"), COMMAND_STATUSES.get((b >> 2) & 0x07, "Reserved"))
+    for b in range(0x100)
+)
+
+# "MISO status byte" setting choices
+STATUS_BYTE = ("Off", "Decode")
+
+# "Coalesce repeated transactions" setting choices
+COALESCE = ("Off", "Identical transactions")
+
+# "Traffic statistics" setting choice -> seconds of capture time per summary frame
+# (None = dump only at the end, False when off)
+TRAFFIC_STATS = { "Off": False, "Dump only": None, "1 s frames and dump": 1.0, "10 s frames and dump": 10.0 }
+
+# "Decode cache" setting choice -> cached transactions, None when off
+DECODE_CACHE_SIZES = { "Off": None, "256": 256, "4096": 4096, "65536": 65536 }
+
+# "Radio modes" setting choices
+RADIO_MODES = ("Off", "Frames and summary", "Summary only")
+
+# "Export" setting choices, the file name used when no export file is set
+EXPORT = ("Off",) + tuple(EXPORT_FORMATS)
+EXPORT_DEFAULT_FILES = { "Binary": "sx128x_in_export.bin", "JSONL": "sx128x_in_export.jsonl" }
+
+# "Initial packet type" setting choices, the packet type names seed the analyzer
+INITIAL_PACKET_TYPES = ("From capture",) + tuple(t.name for t in PacketType if t != PacketType.UNDEFINED)
+
+# "Decoder state snapshots" setting choice -> minimum seconds of capture time between snapshots, None when off
+CHECKPOINT_INTERVALS = { "Off": None, "On change": 0.0, "Every 1 s": 1.0, "Every 10 s": 10.0 }
+CHECKPOINT_DEFAULT_FILE = "sx128x_in_state.jsonl"
+
+# Byte value -> hex() string, payloads are rendered with a single join over this table
+HEX_BYTES = tuple(hex(b) for b in range(0x100))
+
+# "Payload bytes shown" setting choice -> number of bytes rendered (None = all of them)
+PAYLOAD_LIMITS = { "16": 16, "32": 32, "64": 64, "128": 128, "Unlimited": None }
+
+def format_payload(data, limit) -> str:
+    if limit is not None and len(data) > limit:
+        return " ".join(map(HEX_BYTES.__getitem__, data[:limit])) + " (+" + str(len(data) - limit) + " more)"
+    return " ".join(map(HEX_BYTES.__getitem__, data))
+
+# "Unknown opcode logging" setting choices
+UNKNOWN_LOGGING = ("Summary", "Verbose", "Off")
+
+# Capture time in seconds between two printed summaries of unknown transactions
+UNKNOWN_SUMMARY_INTERVAL = 1.0
+
+# "Packet frames" setting choices
+PACKET_FRAMES = ("Off", "With commands", "Packets only")
+
+# Per IRQ latency histograms, printed by finish()
+IRQ_LATENCY = ("Off", "Summary")
+
+# Decoder profiling, also enabled by the SX128X_PROFILE environment variable
+PROFILING = ("Off", "Summary")
+
+# SPI bus statistics window setting -> window length in seconds of capture time, None when off
+BUS_STATS_WINDOWS = {
+    "Off": None,
+    "1 ms": 0.001,
+    "10 ms": 0.01,
+    "100 ms": 0.1,
+    "1 s": 1.0,
+}
+
+class Command:
+    __slots__ = ("opcode", "name", "mosiLen", "misoLen", "decoder", "formats", "cached", "replay")
+
+    def __init__(self, opcode, name, mosiLen, misoLen, decoder, formats, cached=False, replay=None):
+        self.opcode = opcode
+        self.name = name
+        # Minimum number of MOSI/MISO bytes the decoder needs, shorter transactions are reported as unknown
+        self.mosiLen = mosiLen
+        self.misoLen = misoLen
+        self.decoder = decoder
+        # Result type name -> Logic 2 format string for every result type the decoder returns
+        self.formats = formats
+        # Whether the decoder output only depends on the packet type and the MOSI/MISO bytes, so it may
+        # come from the decode cache. replay(analyzer, mosi, miso) reapplies its state changes on a hit.
+        self.cached = cached
+        self.replay = replay
+
+# Opcode byte -> Command, filled in by the @command decorators on the sx128x_in decoder methods
+COMMANDS = {}
+
+def command(opcode, name, mosiLen=1, misoLen=0, format=None, formats=None, cached=False, replay=None):
+    # A decoder returns (result type, data), commands that render differently per modem declare several result types
+    if formats is None:
+        formats = { name: format }
+    def register(decoder):
+        COMMANDS[opcode] = Command(opcode, name, mosiLen, misoLen, decoder, formats, cached, replay)
+        return decoder
+    return register
+
 class sx128x_in(HighLevelAnalyzer):
+    # One result type per command (family), added from the command registry below the class.
+    # Decoders only extract typed fields, the text is rendered by Logic 2 from these format strings.
     result_types = {
-        "SpiTransaction": {
-            "format": "{{data.dataout}}"
+        "Unknown": {
+            "format": "Unknown({{data.mosi}})"
         },
         "SpiTransactionError": {
             "format": "ERROR: {{data.error_info}}",
         }
     }
-    
+
+    payload_limit = ChoicesSetting(choices=tuple(PAYLOAD_LIMITS), label="Payload bytes shown")
+    unknown_logging = ChoicesSetting(choices=UNKNOWN_LOGGING, label="Unknown opcode logging")
+    packet_frames = ChoicesSetting(choices=PACKET_FRAMES, label="Packet frames")
+    irq_latency = ChoicesSetting(choices=IRQ_LATENCY, label="IRQ latency histograms")
+    bus_stats = ChoicesSetting(choices=tuple(BUS_STATS_WINDOWS), label="SPI bus statistics window")
+    profiling = ChoicesSetting(choices=PROFILING, label="Decoder profiling")
+    status_byte = ChoicesSetting(choices=STATUS_BYTE, label="MISO status byte")
+    coalesce = ChoicesSetting(choices=COALESCE, label="Coalesce repeated transactions")
+    payload_protocol = ChoicesSetting(choices=tuple(PAYLOAD_PROTOCOLS), label="Payload protocol")
+    custom_payload_decoder = StringSetting(label="Custom payload decoder (module:function)")
+    channel_plan = ChoicesSetting(choices=tuple(CHANNEL_PLANS), label="FHSS channel plan")
+    decode_cache = ChoicesSetting(choices=tuple(DECODE_CACHE_SIZES), label="Decode cache entries")
+    traffic_stats = ChoicesSetting(choices=tuple(TRAFFIC_STATS), label="Traffic statistics")
+    traffic_dump_file = StringSetting(label="Traffic statistics JSON file (printed when empty)")
+    radio_modes = ChoicesSetting(choices=RADIO_MODES, label="Radio modes")
+    export = ChoicesSetting(choices=EXPORT, label="Export decoded transactions")
+    export_file = StringSetting(label="Export file (default in temp directory)")
+    initial_packet_type = ChoicesSetting(choices=INITIAL_PACKET_TYPES, label="Initial packet type")
+    state_file = StringSetting(label="Seed state from snapshot file")
+    checkpoints = ChoicesSetting(choices=tuple(CHECKPOINT_INTERVALS), label="Decoder state snapshots")
+    checkpoint_file = StringSetting(label="Snapshot file (default in temp directory)")
+
     packetType: PacketType
 
     def __init__(self):
-        # Holds the individual SPI result frames that make up the transaction
-        self.frames = []
+        # Number of payload bytes rendered in WriteBuffer/WriteRegister/ReadRegister, the full payload is in data.payload
+        self.payloadLimit = PAYLOAD_LIMITS[self.payload_limit]
+
+        # MOSI/MISO bytes of the individual SPI result frames that make up the transaction
+        self.mosiParts = []
+        self.misoParts = []
+
+        # MOSI/MISO bytes of the transaction being decoded, joined once from the result frames at disable
+        self.mosi = b""
+        self.miso = b""
+
+        # Decoder of the transaction being decoded, None for unknown opcodes
+        self.command = None
 
         # Whether SPI is currently enabled
         self.spi_enable = False
@@ -33,18 +276,108 @@ class sx128x_in(HighLevelAnalyzer):
 
         # Whether there was an error.
         self.error = False
-        
+
         # Initialize packetType to undefined
         self.packetType = PacketType.UNDEFINED
 
-    def handle_enable(self, frame: AnalyzerFrame):
-        self.frames = []
-        self.spi_enable = True
-        self.error = False
-        self.transaction_start_time = frame.start_time
+        # Data buffer and register contents as far as they are known from the decoded traffic
+        self.shadow = ShadowModel()
+
+        # RangingResult register reads -> distance and distance statistics
+        self.ranging = RangingTracker()
+
+        # Last SetModulationParams as (packet type name, decoded values) and raw SetPacketParams bytes,
+        # used for the expected time on air of every SetTx
+        self.modulation = None
+        self.packetParams = None
+
+        # Captures that start after the radio was configured: seed the state with the last snapshot
+        # of a file, then with the initial packet type setting
+        if self.state_file:
+            try:
+                snapshot = load_snapshot(self.state_file)
+                if snapshot is not None:
+                    self.set_state(snapshot)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                print("State snapshot {} could not be loaded: {}".format(self.state_file, e))
+        if self.initial_packet_type != "From capture":
+            self.packetType = PacketType[self.initial_packet_type]
+
+        # Reassembles TX/RX command sequences into packet frames, None when packet frames are off
+        self.packets = PacketTracker() if self.packet_frames != "Off" else None
+        self.commandFrames = self.packet_frames != "Packets only"
+
+        # Command frame result type -> its variant with the decoded status byte, None when off
+        self.statusTypes = STATUS_RESULT_TYPES if self.status_byte == "Decode" else None
+
+        # Merges identical consecutive command frames into one repeated frame, None when off
+        self.runs = RunCoalescer(REPEATED_RESULT_TYPES) if self.coalesce != "Off" else None
+
+        # TX/RX payload decoders of the selected protocol, loaded on first use, None for raw payloads
+        self.payloads = None
+        if self.payload_protocol != "Raw":
+            self.payloads = PayloadDecoders(self.payload_protocol, self.custom_payload_decoder)
+
+        # SetRfFrequency -> channel index of the selected plan and hop statistics, None when off
+        plan = CHANNEL_PLANS[self.channel_plan]
+        self.channelMap = ChannelMap(plan) if plan is not None else None
+        self.hops = HopStats(len(plan)) if plan is not None else None
+
+        # LRU cache of decoded transactions of the cacheable commands, None when off
+        size = DECODE_CACHE_SIZES[self.decode_cache]
+        self.cache = DecodeCache(size) if size is not None else None
+
+        # Whole capture command mix and traffic counters, None when off
+        interval = TRAFFIC_STATS[self.traffic_stats]
+        self.traffic = None
+        if interval is not False:
+            self.traffic = TrafficCounters({ opcode: cmd.name for opcode, cmd in COMMANDS.items() }, interval)
+
+        # Operating mode timeline and dwell times, None when off
+        self.radioModes = RadioModes() if self.radio_modes != "Off" else None
+        self.modeFrames = self.radio_modes == "Frames and summary"
+
+        # Append-only sink every decoded transaction is written to, None when off
+        self.exportSink = None
+        if self.export != "Off":
+            path = self.export_file or os.path.join(tempfile.gettempdir(), EXPORT_DEFAULT_FILES[self.export])
+            self.exportSink = EXPORT_FORMATS[self.export](path, list(sx128x_in.result_types))
+            print("Exporting decoded transactions to " + path)
+
+        # Decoder state snapshots written as the capture is decoded, None when off
+        interval = CHECKPOINT_INTERVALS[self.checkpoints]
+        self.snapshots = None
+        if interval is not None:
+            path = self.checkpoint_file or os.path.join(tempfile.gettempdir(), CHECKPOINT_DEFAULT_FILE)
+            self.snapshots = Checkpoints(path, interval)
+            print("Writing decoder state snapshots to " + path)
+
+        # SetTx/SetRx -> IRQ and IRQ -> ClrIrqStatus latency histograms, None when off
+        self.irqLatency = IrqLatency() if self.irq_latency != "Off" else None
+
+        # Bus utilization and transaction timing summary frames, None when off
+        window = BUS_STATS_WINDOWS[self.bus_stats]
+        self.busStats = BusStats(window) if window is not None else None
+
+        # Per frame type and per command decoder cost, wraps decode/get_frame_data on this instance only when on
+        self.profiler = Profiler.from_environment(self.profiling)
+        if self.profiler is not None:
+            self.profiler.install(self)
+
+        # Whether every transaction only yields its command frame, complete_transaction() then skips the feature hooks
+        self.plainFrames = (self.commandFrames and self.exportSink is None and self.snapshots is None
+                            and self.busStats is None and self.statusTypes is None and self.runs is None
+                            and self.irqLatency is None and self.traffic is None and self.hops is None
+                            and self.radioModes is None and self.packets is None)
+
+        # Histogram of unrecognized transactions, first MOSI byte (None for an empty transaction) -> count.
+        # Printed as a summary at most every UNKNOWN_SUMMARY_INTERVAL of capture time and by finish().
+        self.unknownCounts = {}
+        self.unknownSummaryTime = None
+        self.finished = False
 
     def reset(self):
-        self.frames = []
+        # The MOSI/MISO parts are replaced by the next enable, result frames are ignored until then
         self.spi_enable = False
         self.error = False
         self.transaction_start_time = None
@@ -52,536 +385,658 @@ class sx128x_in(HighLevelAnalyzer):
     def is_valid_transaction(self) -> bool:
         return self.spi_enable and (not self.error) and (self.transaction_start_time is not None)
 
-    def handle_result(self, frame):
-        if self.spi_enable:
-            self.frames.append(frame)
-
-    def get_frame_data(self) -> dict:
-        miso = bytearray()
-        mosi = bytearray()
-
-        for frame in self.frames:
-            miso += frame.data["miso"]
-            mosi += frame.data["mosi"]
-
-        if len(mosi) > 0:
-            # 0x00 = NOP
-            if len(mosi) >= 1 and mosi[0] == 0x00:
-                return { "dataout": "NOP" }
-
-            # 0x03 = GetPacketType()
-            if len(mosi) >= 3 and len(miso) >= 3 and mosi[0] == 0x03:
-                pType = "UNDEFINED"
-                if miso[2] == PacketType.GFSK:
-                    self.packetType = PacketType.GFSK
-                    pType = "GFSK"
-                if miso[2] == PacketType.LORA:
-                    self.packetType = PacketType.LORA
-                    pType = "LORA"
-                if miso[2] == PacketType.RANGING:
-                    self.packetType = PacketType.RANGING
-                    pType = "RANGING"
-                if miso[2] == PacketType.FLRC:
-                    self.packetType = PacketType.FLRC
-                    pType = "FLRC"
-                if miso[2] == PacketType.BLE:
-                    self.packetType = PacketType.BLE
-                    pType = "BLE"
-                if pType == "UNDEFINED":
-                    self.packetType = PacketType.UNDEFINED
-                return { "dataout": "GetPacketType()=" + pType }
-            
-            # 0x15 = GetIrqStatus()
-            if len(mosi) >= 4 and len(miso) >= 4 and mosi[0] == 0x15:
-                irqStatus = miso[2]*256 + miso[3]
-                return { "dataout": "GetIrqStatus()=" + hex(irqStatus) }
-
-            # 0x17 = GetRxBufferStatus()
-            if len(mosi) >= 4 and len(miso) >= 4 and mosi[0] == 0x17:
-                rxPayloadLen = miso[2]
-                rxStartBufP = miso[3]
-                return { "dataout": "GetRxBufferStatus()=rxPayloadLen=" + str(rxPayloadLen) + ", rxStartBuffP=" + hex(rxStartBufP) }
-
-            # 0x18 = WriteRegister(address, data[0:n])
-            if len(mosi) >= 4 and mosi[0] == 0x18:
-                address = (mosi[1]<<8)+mosi[2]
-                dataWR = hex(mosi[3])
-                if len(mosi) > 4:
-                    for x in range(4, len(mosi)):
-                        dataWR += " " + hex(mosi[x])
-                return { "dataout": "WriteRegister(@" + hex(address) + "," + dataWR + ")" }
-
-            # 0x19 = ReadRegister(address)
-            if len(mosi) >= 5 and len(miso) >= 5 and mosi[0] == 0x19:
-                address = (mosi[1]<<8)+mosi[2]
-                dataRR = hex(miso[4])
-                if len(miso) > 5:
-                    for x in range(5, len(miso)):
-                        dataRR += " " + hex(miso[x])
-                return { "dataout": "ReadRegister(@" + hex(address) + ")=" + dataRR }
-
-            # 0x1A = WriteBuffer(offset, data[0:n])
-            if len(mosi) >= 3 and len(miso) >= 3 and mosi[0] == 0x1A:
-                offset = mosi[1]
-                dataWB = hex(mosi[2])
-                if len(mosi) > 3:
-                    for x in range(3, len(mosi)):
-                        dataWB += " " + hex(mosi[x])
-                return { "dataout": "WriteBuffer(offset=" + hex(offset) + ",data=" + dataWB + ")" }
-
-            # 0x1B = ReadBuffer(offset)
-            if len(mosi) >= 4 and len(miso) >= 4 and mosi[0] == 0x1B:
-                offset = mosi[1]
-                length = str(len(miso) - 3)
-                if length == 1:
-                    return { "dataout": "ReadBuffer(offset=" + hex(offset) + ", 1 byte)" }
-                else:
-                    return { "dataout": "ReadBuffer(offset=" + hex(offset) + ", " + length + " bytes)" }
-
-            # 0x1D = GetPacketStatus()
-            if len(mosi) >= 7 and len(miso) >= 7 and mosi[0] == 0x1D:
-                if self.packetType == PacketType.BLE or self.packetType == PacketType.GFSK or self.packetType == PacketType.FLRC:
-                    if self.packetType == PacketType.BLE:
-                        result = "BLE:"
-                    if self.packetType == PacketType.GFSK:
-                        result = "GFSK:"
-                    if self.packetType == PacketType.FLRC:
-                        result = "FLRC:"
-                    result += "RFU=" + hex(miso[2])
-                    result += ", rssiSync=" + str(-miso[3]/2) + " dBm"
-                    result += ", errors=" + hex(miso[4])
-                    result += ", status=" + hex(miso[5])
-                    syncResult = "sync=ERROR"
-                    if (miso[6] & 0x03) == 0: syncResult = ", SyncAddrDetection Error"
-                    if (miso[6] & 0x03) == 1: syncResult = ", SyncAddr 1 detected"
-                    if (miso[6] & 0x03) == 2: syncResult = ", SyncAddr 2 detected"
-                    if (miso[6] & 0x03) == 3: syncResult = ", SyncAddr 3 detected"
-                    result += ", " + syncResult
-                    return { "dataout": "GetPacketStatus()=" + result}
-                if self.packetType == PacketType.LORA or self.packetType == PacketType.RANGING:
-                    if self.packetType == PacketType.LORA:
-                        result = "LORA:"
-                    if self.packetType == PacketType.RANGING:
-                        result = "RANGING:"
-                    result += "rssiSync=" + str(-miso[2]/2) + " dBm"
-                    result += ", snr=" + str(miso[3]/4) + " dB"
-                    return { "dataout": "GetPacketStatus()=" + result }
-                return { "dataout": "GetPacketStatus()=UNDEFINED protocol" }
-
-            # 0x1F = GetRssiInst()
-            if len(mosi) >= 3 and len(miso) >= 3 and mosi[0] == 0x1F:
-                return { "dataout": "GetRssiInst()=" + str(-miso[2]/2) + " dBm" }
-        
-            # 0x80 = SetStandby(standbyConfig)
-            if len(mosi) >= 2 and mosi[0] == 0x80:
-                if mosi[1] == 0x00: return { "dataout": "SetStandby(RC)" }
-                if mosi[1] == 0x01: return { "dataout": "SetStandby(XOSC)" }
-                return { "dataout": "SetStandby(ERROR)" }
-
-            # 0x82 = SetRx(periodBase, periodBaseCount)
-            if len(mosi) >= 4 and mosi[0] == 0x82:
-                periodBase = mosi[1]
-                periodBaseCount = mosi[2]*256 + mosi[3]
-                return { "dataout": "SetRx(periodBase=" + str(periodBase) + ",periodBaseCount=" + str(periodBaseCount) + ")" }
-
-            # 0x83 = SetTx(periodBase, periodBaseCount)
-            if len(mosi) >= 4 and mosi[0] == 0x83:
-                periodBase = mosi[1]
-                periodBaseCount = mosi[2]*256 + mosi[3]
-                return { "dataout": "SetTx(periodBase=" + str(periodBase) + ",periodBaseCount=" + str(periodBaseCount) + ")" }
-                
-            #0x84 = SetSleep(sleepConfig)
-            if len(mosi) >= 2 and mosi[0] == 0x84:
-                if mosi[1] & 0x01: 
-                    DR = "Data RAM flushed"
-                else:
-                    DR = "Data RAM retention"
-                if mosi[1] & 0x02: 
-                    DB = "Data buffer flushed"
-                else:
-                    DB = "Data buffer retention"
-                return { "dataout": "SetSleep(" + DB + ", " + DR + ")" }
-                
-            # 0x86 = SetRfFrequency(rfFrequency)
-            if len(mosi) >= 4 and mosi[0] == 0x86:
-                rfFrequencyGHz = (mosi[1]*256*256 + mosi[2]*256 + mosi[3]) * 52/(1000*(2**18))
-                return { "dataout": "SetRfFrequency(" + str(round(rfFrequencyGHz,9)) + " GHz)" }
-                
-            # 0x88 = SetCadParams(cadSymbolNum)
-            if len(mosi) >= 2 and mosi[0] == 0x88:
-                symbols = None
-                if mosi[1] == 0x00: symbols = 1
-                if mosi[1] == 0x20: symbols = 2
-                if mosi[1] == 0x40: symbols = 4
-                if mosi[1] == 0x60: symbols = 8
-                if mosi[1] == 0x80: symbols = 16
-                return { "dataout": "SetCadParams(symbols=" + str(symbols) + ")" }
-
-            # 0x8A = SetPacketType(packetType)
-            if len(mosi) >= 2 and mosi[0] == 0x8A:
-                if mosi[1] == 0x00:
-                    self.packetType = PacketType.GFSK
-                    return { "dataout": "SetPacketType(GFSK)" }
-                if mosi[1] == 0x01:
-                    self.packetType = PacketType.LORA
-                    return { "dataout": "SetPacketType(LORA)" }
-                if mosi[1] == 0x02:
-                    self.packetType = PacketType.RANGING
-                    return { "dataout": "SetPacketType(RANGING)" }
-                if mosi[1] == 0x03:
-                    self.packetType = PacketType.FLRC
-                    return { "dataout": "SetPacketType(FLRC)" }
-                if mosi[1] == 0x04:
-                    self.packetType = PacketType.BLE
-                    return { "dataout": "SetPacketType(BLE)" }
-                self.packetType = PacketType.UNDEFINED
-                return { "dataout": "SetPacketType(Reserved)" }
-
-            # 0x8B = SetModulationParams(modParam1, modParam2, modParam3)
-            if len(mosi) >= 4 and mosi[0] == 0x8B:
-                mP1 = mosi[1]
-                mP2 = mosi[2]
-                mP3 = mosi[3]
-                result = ""
-                if self.packetType == PacketType.LORA or self.packetType == PacketType.RANGING:
-                    if self.packetType == PacketType.LORA:
-                        result += "LORA:"
-                    if self.packetType == PacketType.RANGING:
-                        result += "RANGING:"
-                    SP = None
-                    if mP1 == 0x50: SP="5"
-                    if mP1 == 0x60: SP="6"
-                    if mP1 == 0x70: SP="7"
-                    if mP1 == 0x80: SP="8"
-                    if mP1 == 0x90: SP="9"
-                    if mP1 == 0xA0: SP="10"
-                    if self.packetType == PacketType.LORA:
-                        # Not available for RANGING
-                        if mP1 == 0xB0: SP="11"
-                        if mP1 == 0xC0: SP="12"
-                    if SP != None:
-                        result += "SP=" + SP
-                    else:
-                        result += "SP=ERROR"
-                    BW = None
-                    if mP2 == 0x0A: BW="1625.0"
-                    if mP2 == 0x18: BW="812.5"
-                    if mP2 == 0x26: BW="406.25"
-                    if self.packetType == PacketType.LORA:
-                        if mP2 == 0x34: BW="203.125" # Not available for RANGING
-                    if BW != None:
-                        result += ",BW=" + BW + " kHz"
-                    else:
-                        result += ",BW=ERROR"
-                    CR = None
-                    if mP3 == 0x01: CR="4/5"
-                    if mP3 == 0x02: CR="4/6"
-                    if mP3 == 0x03: CR="4/7"
-                    if mP3 == 0x04: CR="4/8"
-                    if mP3 == 0x05: CR="4/5*"
-                    if mP3 == 0x06: CR="4/6*"
-                    if mP3 == 0x07: CR="4/8*"
-                    if CR != None:
-                        result += ",CR=" + CR
-                    else:
-                        result += ",CR=ERROR"
-                if self.packetType == PacketType.GFSK or self.packetType == PacketType.BLE:
-                    if self.packetType == PacketType.GFSK:
-                        result += "GFSK:"
-                    if self.packetType == PacketType.BLE:
-                        result += "BLE:"
-                    BR = None
-                    BW = None
-                    if mP1 == 0x04:
-                        BR="2"
-                        BW="2.4"
-                    if mP1 == 0x28:
-                        BR="1.6"
-                        BW="2.4"
-                    if mP1 == 0x4C:
-                        BR="1"
-                        BW="2.4"
-                    if mP1 == 0x45:
-                        BR="1"
-                        BW="1.2"
-                    if mP1 == 0x70:
-                        BR="0.8"
-                        BW="2.4"
-                    if mP1 == 0x69:
-                        BR="0.8"
-                        BW="1.2"
-                    if mP1 == 0x8D:
-                        BR="0.5"
-                        BW="1.2"
-                    if mP1 == 0x86:
-                        BR="0.5"
-                        BW="0.6"
-                    if mP1 == 0xB1:
-                        BR="0.4"
-                        BW="1.2"
-                    if mP1 == 0xAA:
-                        BR="0.4"
-                        BW="0.6"
-                    if mP1 == 0xCE:
-                        BR="0.25"
-                        BW="0.6"
-                    if mP1 == 0xC7:
-                        BR="0.25"
-                        BW="0.3"
-                    if mP1 == 0xEF:
-                        BR="0.125"
-                        BW="0.3"
-                    if BR != None:
-                        result += "BR=" + BR
-                    else:
-                        result += "BR=ERROR"
-                    if BW != None:
-                        result += ",BW=" + BW
-                    else:
-                        result += ",BW=ERROR"
-                    
-                    MI = None
-                    if mP2 == 0x00: MI="0.35"
-                    if mP2 == 0x01: MI="0.5"
-                    if mP2 == 0x02: MI="0.75"
-                    if mP2 == 0x03: MI="1"
-                    if mP2 == 0x04: MI="1.25"
-                    if mP2 == 0x05: MI="1.5"
-                    if mP2 == 0x06: MI="1.75"
-                    if mP2 == 0x07: MI="2"
-                    if mP2 == 0x08: MI="2.25"
-                    if mP2 == 0x09: MI="2.5"
-                    if mP2 == 0x0A: MI="2.75"
-                    if mP2 == 0x0B: MI="3"
-                    if mP2 == 0x0C: MI="3.25"
-                    if mP2 == 0x0D: MI="3.5"
-                    if mP2 == 0x0E: MI="3.75"
-                    if mP2 == 0x0F: MI="4"
-                    if MI != None:
-                        result += "MI=" + MI
-                    else:
-                        result += "MI=ERROR"
-                    
-                    BT = None
-                    if mP3 == 0x00: BT="No filtering"
-                    if mP3 == 0x10: BT="1"
-                    if mP3 == 0x20: BT="0.5"
-                    if BT != None:
-                        result += "BT=" + BT
-                    else:
-                        result += "BT=ERROR"
-
-                if self.packetType == PacketType.FLRC:
-                    result += "FLRC:"
-                    BR = None
-                    BW = None
-                    if mP1 == 0x45:
-                        BR="1.3"
-                        BW="1.2"
-                    if mP1 == 0x69:
-                        BR="1.04"
-                        BW="1.2"
-                    if mP1 == 0x86:
-                        BR="0.65"
-                        BW="0.6"
-                    if mP1 == 0xAA:
-                        BR="0.52"
-                        BW="0.6"
-                    if mP1 == 0xC7:
-                        BR="0.325"
-                        BW="0.3"
-                    if mP1 == 0xEB:
-                        BR="0.26"
-                        BW="0.3"
-                    if BR != None:
-                        result += "BR=" + BR
-                    else:
-                        result += "BR=ERROR"
-                    if BW != None:
-                        result += ",BW=" + BW
-                    else:
-                        result += ",BW=ERROR"
-                    CR = None
-                    if mP2 == 0x00: CR="1/2"
-                    if mP2 == 0x02: CR="3/4"
-                    if mP2 == 0x04: CR="1"
-                    if mP2 == 0x03 or mP2 >= 0x05: CR="Reserved"
-                    if CR != None:
-                        result += "CR=" + CR
-                    else:
-                        result += "CR=ERROR"
-                    BT = None
-                    if mP3 == 0x00: BT="No filtering"
-                    if mP3 == 0x10: BT="1"
-                    if mP3 == 0x20: BT="0.5"
-                    if BT != None:
-                        result += "BT=" + BT
-                    else:
-                        result += "BT=ERROR"
-
-                if result == "": result = hex(mP1) + "," + hex(mP2) + "," + hex(mP3)
-                return { "dataout": "SetModulationParams(" + result + ")" }
-                
-            # 0x8C = SetPacketParams(packetParam1 .. packetParam7)
-            if len(mosi) >= 8 and mosi[0] == 0x8C:
-                packetParam1 = mosi[1]
-                packetParam2 = mosi[2]
-                packetParam3 = mosi[3]
-                packetParam4 = mosi[4]
-                packetParam5 = mosi[5]
-                packetParam6 = mosi[6]
-                packetParam7 = mosi[7]
-                result = ""
-                
-                if self.packetType == PacketType.GFSK or self.packetType == PacketType.FLRC:
-                    if self.packetType == PacketType.GFSK:
-                        result += "GFSK:"
-                    if self.packetType == PacketType.FLRC:
-                        result += "FLRC:"
-                    result += "PreLen=" + str(packetParam1)
-                    result += ",SWLen=" + str(packetParam2)
-                    result += ",SWM=" + hex(packetParam3)
-                    result += ",HT=" + hex(packetParam4)
-                    result += ",PayLen=" + str(packetParam5)
-                    result += ",CLen=" + str(packetParam6)
-                    result += ",WH=" + hex(packetParam7)
-                    
-                if self.packetType == PacketType.BLE:
-                    result += "BLE:"
-                    result += "CS=" + hex(packetParam1)
-                    result += ",CLen=" + str(packetParam2)
-                    result += ",BTP=" + hex(packetParam3)
-                    result += ",WH=" + hex(packetParam4)
-
-                if self.packetType == PacketType.LORA or self.packetType == PacketType.RANGING:
-                    if self.packetType == PacketType.LORA:
-                        result += "LORA:"
-                    if self.packetType == PacketType.RANGING:
-                        result += "RANGING:"
-                    result += "PreLen=" + str(packetParam1)
-                    result += ",HT=" + hex(packetParam2)
-                    result += ",PayLen=" + str(packetParam3)
-                    result += ",CRC=" + hex(packetParam4)
-                    result += ",Invert=" + hex(packetParam5)
-
-                if result == "":
-                    result = hex(packetParam1) + " " + hex(packetParam2) + " " + hex(packetParam3) + " " + hex(packetParam4) + " " + hex(packetParam5) + " " + hex(packetParam6) + " " + hex(packetParam7)
-                return { "dataout": "SetPacketParams(" + result + ")" }
-                
-            # 0x8D = SetDioIrqParams(irqMask, dio1Mask .. dio3Mask)
-            if len(mosi) >= 9 and mosi[0] == 0x8D:
-                irqMask = mosi[1]*256 + mosi[2]
-                dio1Mask = mosi[3]*256 + mosi[4]
-                dio2Mask = mosi[5]*256 + mosi[6]
-                dio3Mask = mosi[7]*256 + mosi[8]
-                return { "dataout": "SetDioIrqParams(irqM=" + hex(irqMask) + ",dio1M=" + hex(dio1Mask) + ",dio2M=" + hex(dio2Mask) + ",dio3M=" + hex(dio3Mask)  + ")" }
-
-            # 0x8E = SetTxParams(power, rampTime)
-            if len(mosi) >= 3 and mosi[0] == 0x8E:
-                power_dB = mosi[1] - 18
-                if mosi[2] == 0x00: return { "dataout": "SetTxParams(pwr=" + str(power_dB) + "dB, rampTime=2us)" }
-                if mosi[2] == 0x20: return { "dataout": "SetTxParams(pwr=" + str(power_dB) + "dB, rampTime=4us)" }
-                if mosi[2] == 0x40: return { "dataout": "SetTxParams(pwr=" + str(power_dB) + "dB, rampTime=6us)" }
-                if mosi[2] == 0x60: return { "dataout": "SetTxParams(pwr=" + str(power_dB) + "dB, rampTime=8us)" }
-                if mosi[2] == 0x80: return { "dataout": "SetTxParams(pwr=" + str(power_dB) + "dB, rampTime=10us)" }
-                if mosi[2] == 0xA0: return { "dataout": "SetTxParams(pwr=" + str(power_dB) + "dB, rampTime=12us)" }
-                if mosi[2] == 0xC0: return { "dataout": "SetTxParams(pwr=" + str(power_dB) + "dB, rampTime=16us)" }
-                if mosi[2] == 0xE0: return { "dataout": "SetTxParams(pwr=" + str(power_dB) + "dB, rampTime=20us)" }
-                return { "dataout": "SetTxParams(pwr=" + str(power_dB) + "dB, rampTime=ERROR)" }
-
-            # 0x8F = SetBufferBaseAddress(txBaseAddress, rxBaseAddress)
-            if len(mosi) >= 2 and mosi[0] == 0x8F:
-                return { "dataout": "SetBufferBaseAddress(txBA=" + hex(mosi[1]) + ", rxBA=" + hex(mosi[2]) + ")" }
-
-            # 0x94 = SetRxDutyCycle(rxPeriodBase,rxPeriodBaseCount,sleepPeriodBase,sleepPeriodBaseCount)
-            if len(mosi) >= 7 and mosi[0] == 0x94:
-                periodBase = mosi[1]
-                rxPeriodBaseCount = mosi[2]*256 + mosi[3]
-                sleepPeriodBase = mosi[4]
-                sleepPeriodBaseCount = mosi[5]*256 + mosi[6]
-                return { "dataout": "SetRxDutyCycle(pBase=" + str(periodBase) + ", rxPBCount=" + str(rxPeriodBaseCount) + ", sleepPer=" + str(sleepPeriodBase) + ", sleepPBCount" + str(sleepPeriodBaseCount) }
-            
-            # 0x96 = SetRegulatorMode(regulatorMode)
-            if len(mosi) >= 2 and mosi[0] == 0x96:
-                if mosi[1] == 0x00: return { "dataout": "SetRegulatorMode(LDO)" }
-                if mosi[1] == 0x01: return { "dataout": "SetRegulatorMode(DC-DC)" }
-                return { "dataout": "SetRegulatorMode(ERROR)" }
-                
-            # 0x97 = ClrIrqStatus(irqMask)
-            if len(mosi) >= 3 and mosi[0] == 0x97:
-                irqMask = mosi[1]*256 + mosi[2]
-                if irqMask == 0xFFFF: return { "dataout": "ClrIrqStatus(ALL)" }
-                return { "dataout": "ClrIrqStatus(" + hex(irqMask) + ")" }
-            
-            # 0x98 = SetAutoTx(time)
-            if len(mosi) >= 3 and mosi[0] == 0x98:
-                time = mosi[1]*256 + mosi[2]
-                return { "dataout": "SetAutoTx(" + str(time) + " us)" }
-
-            # 0x9A = SetAdvancedRanging(enable)
-            if len(mosi) >= 2 and mosi[0] == 0x9A:
-                result = "ERROR"
-                if mosi[1] == 0x00: result = "disable"
-                if mosi[1] == 0x01: result = "enable"
-                return { "dataout": "SetAdvancedRanging(" + result + ")" }
-
-            # 0x9B = SetLongPreamble(enable)
-            if len(mosi) >= 2 and mosi[0] == 0x9B:
-                result = "ERROR"
-                if mosi[1] == 0: result = "disable"
-                if mosi[1] == 1: result = "enable"
-                return { "dataout": "SetLongPreamble(" + result + ")" }
-
-            # 0x9D = SetUartSpeed(uartSpeed) UART only, not available with SPI
-
-            # 0x9E = SetAutoFS(enable)
-            if len(mosi) >= 2 and mosi[0] == 0x9E:
-                if mosi[1] == 0x00: return { "dataout": "SetAutoFS(disable)" }
-                if mosi[1] == 0x01: return { "dataout": "SetAutoFS(enable)" }
-                return { "dataout": "SetAutoFS(ERROR)" }
-
-            # 0xA3 = SetRangingRole(role)
-            if len(mosi) >= 2 and mosi[0] == 0xA3:
-                result = "ERROR"
-                if mosi[1] == 0x00: result = "Slave"
-                if mosi[1] == 0x01: result = "Master"
-                return { "dataout": "SetRangingRole(" + result + ")" }
-                
-            # 0xC0 = GetStatus()
-            if len(mosi) >= 1 and mosi[0] == 0xC0:
-                return { "dataout": "GetStatus()" }
-            
-            # 0xC1 = SetFs()
-            if len(mosi) >= 1 and mosi[0] == 0xC1:
-                return { "dataout": "SetFs()" }
-                
-            # 0xC5 = SetCad()
-            if len(mosi) >= 1 and mosi[0] == 0xC5:
-                return { "dataout": "SetCad()" }
-
-            # 0xD1 = SetTxContinuousWave()
-            if len(mosi) >= 1 and mosi[0] == 0xD1:
-                return { "dataout": "SetTxContinuousWave()" }
-
-            # 0xD2 = SetTxContinuousPreamble()
-            if len(mosi) >= 1 and mosi[0] == 0xD2:
-                return { "dataout": "SetTxContinuousPreamble()" }
-                
-            # 0xD5 = SetSaveContext()
-            if len(mosi) >= 1 and mosi[0] == 0xD5:
-                return { "dataout": "SetSaveContext()" }
-
-        print("Unknown(" + mosi.hex(' ') + ")");
-        return { "dataout": "Unknown(" + mosi.hex(' ') + ")" }
+    def get_frame_data(self) -> tuple:
+        mosi = self.mosi
+        miso = self.miso
+        cmd = self.command
+        if cmd is not None and len(mosi) >= cmd.mosiLen and len(miso) >= cmd.misoLen:
+            if self.cache is None or not cmd.cached:
+                resultType, data = cmd.decoder(self, mosi, miso)
+                data["opcode"] = cmd.opcode
+                return resultType, data
+            # Looked up with the packet type before the decoder runs, the decoder may change it
+            key = (mosi, miso)
+            packetType = self.packetType
+            entry = self.cache.get(key, packetType)
+            if entry is not None:
+                if cmd.replay is not None:
+                    cmd.replay(self, mosi, miso)
+                return entry
+            resultType, data = cmd.decoder(self, mosi, miso)
+            data["opcode"] = cmd.opcode
+            self.cache.put(key, packetType, resultType, data)
+            return resultType, data
+
+        self.count_unknown(mosi)
+        return "Unknown", { "mosi": mosi.hex(' ') }
+
+    def count_unknown(self, mosi):
+        opcode = mosi[0] if len(mosi) > 0 else None
+        self.unknownCounts[opcode] = self.unknownCounts.get(opcode, 0) + 1
+        if self.unknown_logging == "Verbose":
+            print("Unknown(" + mosi.hex(' ') + ")")
+        elif self.unknown_logging == "Summary":
+            if self.unknownSummaryTime is None:
+                self.unknownSummaryTime = self.transaction_start_time
+            elif float(self.transaction_start_time - self.unknownSummaryTime) >= UNKNOWN_SUMMARY_INTERVAL:
+                self.unknownSummaryTime = self.transaction_start_time
+                self.print_unknown_summary()
+
+    def print_unknown_summary(self):
+        counts = []
+        for opcode, count in sorted(self.unknownCounts.items(), key=lambda item: -item[1]):
+            if opcode is None:
+                name = "<empty>"
+            elif opcode in COMMANDS:
+                name = "{:#04x} {} (too short)".format(opcode, COMMANDS[opcode].name)
+            else:
+                name = "{:#04x}".format(opcode)
+            counts.append("{} x{}".format(name, count))
+        print("Unknown transactions: " + ", ".join(counts))
+
+    def finish(self):
+        # Called once decoding is over: offline tools call it explicitly, inside Logic 2 it runs when the analyzer is discarded
+        if self.finished:
+            return
+        self.finished = True
+        if self.unknownCounts and self.unknown_logging != "Off":
+            self.print_unknown_summary()
+        if self.irqLatency is not None:
+            for line in self.irqLatency.summary():
+                print(line)
+        if self.radioModes is not None:
+            for line in self.radioModes.summary():
+                print(line)
+        if self.hops is not None:
+            for line in self.hops.summary():
+                print(line)
+        if self.ranging.count > 0:
+            for line in self.ranging.summary():
+                print(line)
+        if self.cache is not None:
+            for line in self.cache.summary():
+                print(line)
+        if self.traffic is not None:
+            self.traffic.finish(self.traffic_dump_file)
+        if self.busStats is not None:
+            for line in self.busStats.report():
+                print(line)
+        if self.profiler is not None:
+            self.profiler.finish()
+        if self.exportSink is not None:
+            self.exportSink.close()
+        if self.snapshots is not None:
+            self.snapshots.close(self.get_state())
+
+    def get_state(self) -> dict:
+        """State carried from one transaction to the next, as a JSON serializable snapshot."""
+        modulation = None
+        if self.modulation is not None:
+            modulation = [self.modulation[0], list(self.modulation[1])]
+        return {
+            "packetType": self.packetType.name,
+            "modulation": modulation,
+            "packetParams": self.packetParams.hex() if self.packetParams is not None else None,
+            "shadow": self.shadow.get_state(),
+        }
+
+    def set_state(self, state: dict):
+        """Seed the state from a get_state() snapshot, fields that are absent are left unchanged."""
+        if "packetType" in state:
+            self.packetType = PacketType[state["packetType"]]
+        if "modulation" in state:
+            modulation = state["modulation"]
+            self.modulation = (modulation[0], tuple(modulation[1])) if modulation is not None else None
+        if "packetParams" in state:
+            packetParams = state["packetParams"]
+            self.packetParams = bytes.fromhex(packetParams) if packetParams is not None else None
+        if "shadow" in state:
+            self.shadow.set_state(state["shadow"])
+
+    def flush(self):
+        """Frame held back by the repeated transaction coalescing, None when there is none.
+
+        Logic 2 has no end of capture callback, offline tools call this before finish()."""
+        if self.runs is None:
+            return None
+        run = self.runs.flush()
+        return AnalyzerFrame(*run) if run is not None else None
+
+    def __del__(self):
+        try:
+            self.finish()
+        except Exception:
+            # The interpreter may already be shutting down
+            pass
+
+    # 0x00 = NOP
+    @command(0x00, "NOP", format="NOP", cached=True)
+    def decode_nop(self, mosi, miso):
+        return "NOP", {}
+
+    # 0x03 = GetPacketType()
+    def apply_get_packet_type(self, mosi, miso):
+        self.packetType = PACKET_TYPES.get(miso[2], PacketType.UNDEFINED)
+
+    @command(0x03, "GetPacketType", 3, 3, format="GetPacketType()={{data.packetType}}", cached=True, replay=apply_get_packet_type)
+    def decode_get_packet_type(self, mosi, miso):
+        self.apply_get_packet_type(mosi, miso)
+        return "GetPacketType", { "packetType": self.packetType.name }
+
+    # 0x15 = GetIrqStatus()
+    @command(0x15, "GetIrqStatus", 4, 4, format="GetIrqStatus()={{data.irqStatusText}} {{data.irqFlags}}", cached=True)
+    def decode_get_irq_status(self, mosi, miso):
+        irqStatus = (miso[2]<<8)+miso[3]
+        return "GetIrqStatus", { "irqStatus": irqStatus, "irqStatusText": hex(irqStatus), "irqFlags": irq_flags(irqStatus) }
+
+    # 0x17 = GetRxBufferStatus()
+    def apply_get_rx_buffer_status(self, mosi, miso):
+        self.shadow.set_rx_status(miso[3], miso[2])
+
+    @command(0x17, "GetRxBufferStatus", 4, 4, format="GetRxBufferStatus()=rxPayloadLen={{data.rxPayloadLength}}, rxStartBuffP={{data.rxStartBufferPointerText}}", cached=True, replay=apply_get_rx_buffer_status)
+    def decode_get_rx_buffer_status(self, mosi, miso):
+        self.apply_get_rx_buffer_status(mosi, miso)
+        return "GetRxBufferStatus", {
+            "rxPayloadLength": miso[2],
+            "rxStartBufferPointer": miso[3],
+            "rxStartBufferPointerText": HEX_BYTES[miso[3]],
+        }
+
+    # 0x18 = WriteRegister(address, data[0:n])
+    @command(0x18, "WriteRegister", 4, formats={
+        "WriteRegister": "WriteRegister(@{{data.addressText}},{{data.payloadText}})",
+        "WriteRegisterNamed": "WriteRegister(@{{data.addressText}},{{data.payloadText}}) {{data.registers}}",
+    })
+    def decode_write_register(self, mosi, miso):
+        address = (mosi[1]<<8)+mosi[2]
+        payload = mosi[3:]
+        self.shadow.write_register(address, payload)
+        data = {
+            "address": address,
+            "addressText": hex(address),
+            "length": len(payload),
+            "payload": payload,
+            "payloadText": format_payload(payload, self.payloadLimit),
+        }
+        registers = register_names(address, payload)
+        if registers == "":
+            return "WriteRegister", data
+        data["registers"] = registers
+        return "WriteRegisterNamed", data
+
+    # 0x19 = ReadRegister(address)
+    @command(0x19, "ReadRegister", 5, 5, formats={
+        "ReadRegister": "ReadRegister(@{{data.addressText}})={{data.payloadText}}",
+        "ReadRegisterNamed": "ReadRegister(@{{data.addressText}})={{data.payloadText}} {{data.registers}}",
+        "ReadRegisterMismatch": "ReadRegister(@{{data.addressText}})={{data.payloadText}} MISMATCH, written {{data.writtenText}} {{data.registers}}",
+        "ReadRegisterRanging": "ReadRegister(@{{data.addressText}})={{data.payloadText}} {{data.registers}} {{data.rangingType}} ranging result {{data.distance}} m, calibration {{data.calibration}}",
+    })
+    def decode_read_register(self, mosi, miso):
+        address = (mosi[1]<<8)+mosi[2]
+        payload = miso[4:]
+        data = {
+            "address": address,
+            "addressText": hex(address),
+            "length": len(payload),
+            "payload": payload,
+            "payloadText": format_payload(payload, self.payloadLimit),
+        }
+        registers = register_names(address, payload)
+        written = self.shadow.read_register(address, payload)
+        ranging = self.ranging.read(address, payload, self.shadow.registers, self.modulation)
+        if ranging is not None and written is None:
+            data.update(ranging)
+            data["registers"] = registers
+            return "ReadRegisterRanging", data
+        if written is None:
+            if registers == "":
+                return "ReadRegister", data
+            data["registers"] = registers
+            return "ReadRegisterNamed", data
+        data["writtenText"] = " ".join([HEX_BYTES[w] if w is not None else "--" for w in written])
+        data["registers"] = registers if registers != "" else "(unnamed)"
+        return "ReadRegisterMismatch", data
+
+    # 0x1A = WriteBuffer(offset, data[0:n])
+    @command(0x1A, "WriteBuffer", 3, 3, formats={
+        "WriteBuffer": "WriteBuffer(offset={{data.offsetText}},data={{data.payloadText}})",
+        "WriteBufferDecoded": "WriteBuffer(offset={{data.offsetText}},data={{data.payloadText}}) {{data.decoded}}",
+    })
+    def decode_write_buffer(self, mosi, miso):
+        payload = mosi[2:]
+        self.shadow.write_buffer(mosi[1], payload)
+        data = {
+            "offset": mosi[1],
+            "offsetText": HEX_BYTES[mosi[1]],
+            "length": len(payload),
+            "payload": payload,
+            "payloadText": format_payload(payload, self.payloadLimit),
+        }
+        # Only a write of the whole packet from the TX base address can be decoded
+        if self.payloads is not None and mosi[1] == self.shadow.txBase and self.decode_payload(data):
+            return "WriteBufferDecoded", data
+        return "WriteBuffer", data
+
+    def decode_payload(self, data) -> bool:
+        decoded = self.payloads.decode(self.packetType.name, data["payload"])
+        if decoded is None:
+            return False
+        data["decoded"], fields = decoded
+        for key, value in fields.items():
+            data["payload" + key[:1].upper() + key[1:]] = value
+        return True
+
+    # 0x1B = ReadBuffer(offset)
+    @command(0x1B, "ReadBuffer", 4, 4, formats={
+        "ReadBuffer": "ReadBuffer(offset={{data.offsetText}}, length={{data.length}})",
+        "ReadBufferRegion": "ReadBuffer(offset={{data.offsetText}}, length={{data.length}}) {{data.region}}",
+        "ReadBufferDecoded": "ReadBuffer(offset={{data.offsetText}}, length={{data.length}}) {{data.region}} {{data.decoded}}",
+    })
+    def decode_read_buffer(self, mosi, miso):
+        payload = miso[3:]
+        data = { "offset": mosi[1], "offsetText": HEX_BYTES[mosi[1]], "length": len(payload), "payload": payload }
+        region = self.shadow.read_buffer(mosi[1], payload)
+        if region == "":
+            return "ReadBuffer", data
+        data["region"] = region
+        # Only a read of the whole received packet can be decoded
+        if (self.payloads is not None and mosi[1] == self.shadow.rxStart and len(payload) == self.shadow.rxLength
+                and self.decode_payload(data)):
+            return "ReadBufferDecoded", data
+        return "ReadBufferRegion", data
+
+    # 0x1D = GetPacketStatus()
+    @command(0x1D, "GetPacketStatus", 7, 7, cached=True, formats={
+        "GetPacketStatusGfsk": "GetPacketStatus()={{data.packetType}}:RFU={{data.rfuText}}, rssiSync={{data.rssiSync}} dBm, errors={{data.errorsText}}, status={{data.statusText}}, {{data.sync}}",
+        "GetPacketStatusLora": "GetPacketStatus()={{data.packetType}}:rssiSync={{data.rssiSync}} dBm, snr={{data.snr}} dB",
+        "GetPacketStatusUndefined": "GetPacketStatus()=UNDEFINED protocol",
+    })
+    def decode_get_packet_status(self, mosi, miso):
+        if self.packetType == PacketType.BLE or self.packetType == PacketType.GFSK or self.packetType == PacketType.FLRC:
+            return "GetPacketStatusGfsk", {
+                "packetType": self.packetType.name,
+                "rfu": miso[2],
+                "rfuText": HEX_BYTES[miso[2]],
+                "rssiSync": -miso[3]/2,
+                "errors": miso[4],
+                "errorsText": HEX_BYTES[miso[4]],
+                "status": miso[5],
+                "statusText": HEX_BYTES[miso[5]],
+                "sync": SYNC_ADDRESS_RESULTS[miso[6] & 0x03],
+            }
+        if self.packetType == PacketType.LORA or self.packetType == PacketType.RANGING:
+            return "GetPacketStatusLora", { "packetType": self.packetType.name, "rssiSync": -miso[2]/2, "snr": miso[3]/4 }
+        return "GetPacketStatusUndefined", {}
+
+    # 0x1F = GetRssiInst()
+    @command(0x1F, "GetRssiInst", 3, 3, format="GetRssiInst()={{data.rssi}} dBm", cached=True)
+    def decode_get_rssi_inst(self, mosi, miso):
+        return "GetRssiInst", { "rssi": -miso[2]/2 }
+
+    # 0x80 = SetStandby(standbyConfig)
+    @command(0x80, "SetStandby", 2, format="SetStandby({{data.standbyConfig}})", cached=True)
+    def decode_set_standby(self, mosi, miso):
+        return "SetStandby", { "standbyConfig": STANDBY_CONFIGS.get(mosi[1], "ERROR") }
+
+    # 0x82 = SetRx(periodBase, periodBaseCount)
+    @command(0x82, "SetRx", 4, format="SetRx(periodBase={{data.periodBase}},periodBaseCount={{data.periodBaseCount}})", cached=True)
+    def decode_set_rx(self, mosi, miso):
+        return "SetRx", { "periodBase": mosi[1], "periodBaseCount": (mosi[2]<<8)+mosi[3] }
+
+    # 0x83 = SetTx(periodBase, periodBaseCount)
+    @command(0x83, "SetTx", 4, formats={
+        "SetTx": "SetTx(periodBase={{data.periodBase}},periodBaseCount={{data.periodBaseCount}})",
+        "SetTxAirtime": "SetTx(periodBase={{data.periodBase}},periodBaseCount={{data.periodBaseCount}}) ToA={{data.timeOnAir}} us, preamble={{data.preambleTime}} us, symbol={{data.symbolTime}} us",
+    })
+    def decode_set_tx(self, mosi, miso):
+        data = { "periodBase": mosi[1], "periodBaseCount": (mosi[2]<<8)+mosi[3] }
+        airtime = self.expected_airtime()
+        if airtime is None:
+            return "SetTx", data
+        data["timeOnAir"], data["preambleTime"], data["symbolTime"] = airtime
+        return "SetTxAirtime", data
+
+    def expected_airtime(self):
+        # Only valid when the modulation was set for the current packet type and packet params are known
+        if self.modulation is None or self.packetParams is None or self.modulation[0] != self.packetType.name:
+            return None
+        # The BLE payload length is part of the PDU written to the buffer, not of the packet params
+        txLength = self.shadow.txLength if self.packetType == PacketType.BLE else 0
+        return time_on_air(self.packetType.name, self.modulation[1], self.packetParams, txLength)
+
+    # 0x84 = SetSleep(sleepConfig)
+    @command(0x84, "SetSleep", 2, format="SetSleep({{data.dataBuffer}}, {{data.dataRam}})", cached=True)
+    def decode_set_sleep(self, mosi, miso):
+        return "SetSleep", {
+            "dataBuffer": "Data buffer flushed" if mosi[1] & 0x02 else "Data buffer retention",
+            "dataRam": "Data RAM flushed" if mosi[1] & 0x01 else "Data RAM retention",
+        }
+
+    # 0x86 = SetRfFrequency(rfFrequency)
+    @command(0x86, "SetRfFrequency", 4, cached=True, formats={
+        "SetRfFrequency": "SetRfFrequency({{data.frequency}} Hz)",
+        "SetRfFrequencyChannel": "SetRfFrequency({{data.frequency}} Hz) ch {{data.channel}}",
+    })
+    def decode_set_rf_frequency(self, mosi, miso):
+        rfFrequency = (mosi[1]<<16)+(mosi[2]<<8)+mosi[3]
+        frequency = (rfFrequency*XTAL_FREQUENCY + (1<<(PLL_STEP_SHIFT-1))) >> PLL_STEP_SHIFT
+        data = { "rfFrequency": rfFrequency, "frequency": frequency }
+        if self.channelMap is None:
+            return "SetRfFrequency", data
+        channel = self.channelMap.channel(rfFrequency)
+        if channel is None:
+            return "SetRfFrequency", data
+        data["channel"] = channel
+        return "SetRfFrequencyChannel", data
+
+    # 0x88 = SetCadParams(cadSymbolNum)
+    @command(0x88, "SetCadParams", 2, format="SetCadParams(symbols={{data.symbols}})", cached=True)
+    def decode_set_cad_params(self, mosi, miso):
+        return "SetCadParams", { "symbols": CAD_SYMBOLS.get(mosi[1], "ERROR") }
+
+    # 0x8A = SetPacketType(packetType)
+    def apply_set_packet_type(self, mosi, miso):
+        self.packetType = PACKET_TYPES.get(mosi[1], PacketType.UNDEFINED)
+
+    @command(0x8A, "SetPacketType", 2, format="SetPacketType({{data.packetType}})", cached=True, replay=apply_set_packet_type)
+    def decode_set_packet_type(self, mosi, miso):
+        self.apply_set_packet_type(mosi, miso)
+        if self.packetType == PacketType.UNDEFINED:
+            return "SetPacketType", { "packetType": "Reserved" }
+        return "SetPacketType", { "packetType": self.packetType.name }
+
+    # 0x8B = SetModulationParams(modParam1, modParam2, modParam3)
+    @command(0x8B, "SetModulationParams", 4, formats={
+        "SetModulationParamsLora": "SetModulationParams({{data.packetType}}:SF={{data.spreadingFactor}},BW={{data.bandwidth}} kHz,CR={{data.codingRate}})",
+        "SetModulationParamsGfsk": "SetModulationParams({{data.packetType}}:BR={{data.bitrate}} Mb/s,BW={{data.bandwidth}} MHz,MI={{data.modulationIndex}},BT={{data.bt}})",
+        "SetModulationParamsFlrc": "SetModulationParams({{data.packetType}}:BR={{data.bitrate}} Mb/s,BW={{data.bandwidth}} MHz,CR={{data.codingRate}},BT={{data.bt}})",
+        "SetModulationParams": "SetModulationParams({{data.modParam1Text}},{{data.modParam2Text}},{{data.modParam3Text}})",
+    })
+    def decode_set_modulation_params(self, mosi, miso):
+        mP1 = mosi[1]
+        mP2 = mosi[2]
+        mP3 = mosi[3]
+        if self.packetType == PacketType.LORA or self.packetType == PacketType.RANGING:
+            SF = SPREADING_FACTORS[self.packetType].get(mP1, "ERROR")
+            BW = LORA_BANDWIDTHS[self.packetType].get(mP2, "ERROR")
+            CR = LORA_CODING_RATES.get(mP3, "ERROR")
+            self.modulation = (self.packetType.name, (SF, BW, CR))
+            return "SetModulationParamsLora", {
+                "packetType": self.packetType.name,
+                "spreadingFactor": SF,
+                "bandwidth": BW,
+                "codingRate": CR,
+            }
+        if self.packetType == PacketType.GFSK or self.packetType == PacketType.BLE:
+            BR, BW = BITRATE_BANDWIDTHS[self.packetType].get(mP1, ("ERROR", "ERROR"))
+            MI = GFSK_MODULATION_INDEXES.get(mP2, "ERROR")
+            BT = BT_FILTERS.get(mP3, "ERROR")
+            self.modulation = (self.packetType.name, (BR, BW, MI, BT))
+            return "SetModulationParamsGfsk", {
+                "packetType": self.packetType.name,
+                "bitrate": BR,
+                "bandwidth": BW,
+                "modulationIndex": MI,
+                "bt": BT,
+            }
+        if self.packetType == PacketType.FLRC:
+            BR, BW = BITRATE_BANDWIDTHS[self.packetType].get(mP1, ("ERROR", "ERROR"))
+            CR = FLRC_CODING_RATES[mP2]
+            BT = BT_FILTERS.get(mP3, "ERROR")
+            self.modulation = (self.packetType.name, (BR, BW, CR, BT))
+            return "SetModulationParamsFlrc", {
+                "packetType": self.packetType.name,
+                "bitrate": BR,
+                "bandwidth": BW,
+                "codingRate": CR,
+                "bt": BT,
+            }
+        self.modulation = None
+        return "SetModulationParams", {
+            "modParam1": mP1,
+            "modParam2": mP2,
+            "modParam3": mP3,
+            "modParam1Text": HEX_BYTES[mP1],
+            "modParam2Text": HEX_BYTES[mP2],
+            "modParam3Text": HEX_BYTES[mP3],
+        }
+
+    # 0x8C = SetPacketParams(packetParam1 .. packetParam7)
+    def apply_set_packet_params(self, mosi, miso):
+        self.packetParams = mosi[1:8]
+
+    @command(0x8C, "SetPacketParams", 8, cached=True, replay=apply_set_packet_params, formats={
+        "SetPacketParamsGfsk": "SetPacketParams({{data.packetType}}:PreLen={{data.preambleLength}},SWLen={{data.syncWordLength}},SWM={{data.syncWordMatchText}},HT={{data.headerTypeText}},PayLen={{data.payloadLength}},CLen={{data.crcLength}},WH={{data.whiteningText}})",
+        "SetPacketParamsBle": "SetPacketParams(BLE:CS={{data.connectionStateText}},CLen={{data.crcLength}},BTP={{data.testPayloadText}},WH={{data.whiteningText}})",
+        "SetPacketParamsLora": "SetPacketParams({{data.packetType}}:PreLen={{data.preambleLength}},HT={{data.headerTypeText}},PayLen={{data.payloadLength}},CRC={{data.crcText}},Invert={{data.invertIqText}})",
+        "SetPacketParams": "SetPacketParams({{data.packetParam1Text}} {{data.packetParam2Text}} {{data.packetParam3Text}} {{data.packetParam4Text}} {{data.packetParam5Text}} {{data.packetParam6Text}} {{data.packetParam7Text}})",
+    })
+    def decode_set_packet_params(self, mosi, miso):
+        self.apply_set_packet_params(mosi, miso)
+        if self.packetType == PacketType.GFSK or self.packetType == PacketType.FLRC:
+            return "SetPacketParamsGfsk", {
+                "packetType": self.packetType.name,
+                "preambleLength": mosi[1],
+                "syncWordLength": mosi[2],
+                "syncWordMatch": mosi[3],
+                "headerType": mosi[4],
+                "payloadLength": mosi[5],
+                "crcLength": mosi[6],
+                "whitening": mosi[7],
+                "syncWordMatchText": HEX_BYTES[mosi[3]],
+                "headerTypeText": HEX_BYTES[mosi[4]],
+                "whiteningText": HEX_BYTES[mosi[7]],
+            }
+        if self.packetType == PacketType.BLE:
+            return "SetPacketParamsBle", {
+                "packetType": self.packetType.name,
+                "connectionState": mosi[1],
+                "crcLength": mosi[2],
+                "testPayload": mosi[3],
+                "whitening": mosi[4],
+                "connectionStateText": HEX_BYTES[mosi[1]],
+                "testPayloadText": HEX_BYTES[mosi[3]],
+                "whiteningText": HEX_BYTES[mosi[4]],
+            }
+        if self.packetType == PacketType.LORA or self.packetType == PacketType.RANGING:
+            return "SetPacketParamsLora", {
+                "packetType": self.packetType.name,
+                "preambleLength": mosi[1],
+                "headerType": mosi[2],
+                "payloadLength": mosi[3],
+                "crc": mosi[4],
+                "invertIq": mosi[5],
+                "headerTypeText": HEX_BYTES[mosi[2]],
+                "crcText": HEX_BYTES[mosi[4]],
+                "invertIqText": HEX_BYTES[mosi[5]],
+            }
+        data = {}
+        for i in range(1, 8):
+            data["packetParam{}".format(i)] = mosi[i]
+            data["packetParam{}Text".format(i)] = HEX_BYTES[mosi[i]]
+        return "SetPacketParams", data
+
+    # 0x8D = SetDioIrqParams(irqMask, dio1Mask .. dio3Mask)
+    @command(0x8D, "SetDioIrqParams", 9, format="SetDioIrqParams(irqM={{data.irqFlags}},dio1M={{data.dio1Flags}},dio2M={{data.dio2Flags}},dio3M={{data.dio3Flags}})", cached=True)
+    def decode_set_dio_irq_params(self, mosi, miso):
+        irqMask = (mosi[1]<<8)+mosi[2]
+        dio1Mask = (mosi[3]<<8)+mosi[4]
+        dio2Mask = (mosi[5]<<8)+mosi[6]
+        dio3Mask = (mosi[7]<<8)+mosi[8]
+        return "SetDioIrqParams", {
+            "irqMask": irqMask,
+            "dio1Mask": dio1Mask,
+            "dio2Mask": dio2Mask,
+            "dio3Mask": dio3Mask,
+            "irqFlags": irq_flags(irqMask),
+            "dio1Flags": irq_flags(dio1Mask),
+            "dio2Flags": irq_flags(dio2Mask),
+            "dio3Flags": irq_flags(dio3Mask),
+        }
+
+    # 0x8E = SetTxParams(power, rampTime)
+    @command(0x8E, "SetTxParams", 3, format="SetTxParams(pwr={{data.power}}dBm, rampTime={{data.rampTime}} us)", cached=True)
+    def decode_set_tx_params(self, mosi, miso):
+        return "SetTxParams", { "power": mosi[1] - 18, "rampTime": TX_RAMP_TIMES.get(mosi[2], "ERROR") }
+
+    # 0x8F = SetBufferBaseAddress(txBaseAddress, rxBaseAddress)
+    def apply_set_buffer_base_address(self, mosi, miso):
+        self.shadow.set_base_addresses(mosi[1], mosi[2])
+
+    @command(0x8F, "SetBufferBaseAddress", 3, format="SetBufferBaseAddress(txBA={{data.txBaseAddressText}}, rxBA={{data.rxBaseAddressText}})", cached=True, replay=apply_set_buffer_base_address)
+    def decode_set_buffer_base_address(self, mosi, miso):
+        self.apply_set_buffer_base_address(mosi, miso)
+        return "SetBufferBaseAddress", {
+            "txBaseAddress": mosi[1],
+            "rxBaseAddress": mosi[2],
+            "txBaseAddressText": HEX_BYTES[mosi[1]],
+            "rxBaseAddressText": HEX_BYTES[mosi[2]],
+        }
+
+    # 0x94 = SetRxDutyCycle(rxPeriodBase,rxPeriodBaseCount,sleepPeriodBase,sleepPeriodBaseCount)
+    @command(0x94, "SetRxDutyCycle", 7, format="SetRxDutyCycle(pBase={{data.periodBase}}, rxPBCount={{data.rxPeriodBaseCount}}, sleepPer={{data.sleepPeriodBase}}, sleepPBCount={{data.sleepPeriodBaseCount}})", cached=True)
+    def decode_set_rx_duty_cycle(self, mosi, miso):
+        return "SetRxDutyCycle", {
+            "periodBase": mosi[1],
+            "rxPeriodBaseCount": (mosi[2]<<8)+mosi[3],
+            "sleepPeriodBase": mosi[4],
+            "sleepPeriodBaseCount": (mosi[5]<<8)+mosi[6],
+        }
+
+    # 0x96 = SetRegulatorMode(regulatorMode)
+    @command(0x96, "SetRegulatorMode", 2, format="SetRegulatorMode({{data.regulatorMode}})", cached=True)
+    def decode_set_regulator_mode(self, mosi, miso):
+        return "SetRegulatorMode", { "regulatorMode": REGULATOR_MODES.get(mosi[1], "ERROR") }
+
+    # 0x97 = ClrIrqStatus(irqMask)
+    @command(0x97, "ClrIrqStatus", 3, format="ClrIrqStatus({{data.irqFlags}})", cached=True)
+    def decode_clr_irq_status(self, mosi, miso):
+        irqMask = (mosi[1]<<8)+mosi[2]
+        if irqMask == 0xFFFF: return "ClrIrqStatus", { "irqMask": irqMask, "irqFlags": "ALL" }
+        return "ClrIrqStatus", { "irqMask": irqMask, "irqFlags": irq_flags(irqMask) }
+
+    # 0x98 = SetAutoTx(time)
+    @command(0x98, "SetAutoTx", 3, format="SetAutoTx({{data.time}} us)", cached=True)
+    def decode_set_auto_tx(self, mosi, miso):
+        return "SetAutoTx", { "time": (mosi[1]<<8)+mosi[2] }
+
+    # 0x9A = SetAdvancedRanging(enable)
+    @command(0x9A, "SetAdvancedRanging", 2, format="SetAdvancedRanging({{data.enable}})", cached=True)
+    def decode_set_advanced_ranging(self, mosi, miso):
+        return "SetAdvancedRanging", { "enable": ENABLE_STATES.get(mosi[1], "ERROR") }
+
+    # 0x9B = SetLongPreamble(enable)
+    @command(0x9B, "SetLongPreamble", 2, format="SetLongPreamble({{data.enable}})", cached=True)
+    def decode_set_long_preamble(self, mosi, miso):
+        return "SetLongPreamble", { "enable": ENABLE_STATES.get(mosi[1], "ERROR") }
+
+    # 0x9D = SetUartSpeed(uartSpeed) UART only, not available with SPI
+
+    # 0x9E = SetAutoFS(enable)
+    @command(0x9E, "SetAutoFS", 2, format="SetAutoFS({{data.enable}})", cached=True)
+    def decode_set_auto_fs(self, mosi, miso):
+        return "SetAutoFS", { "enable": ENABLE_STATES.get(mosi[1], "ERROR") }
+
+    # 0xA3 = SetRangingRole(role)
+    @command(0xA3, "SetRangingRole", 2, format="SetRangingRole({{data.role}})", cached=True)
+    def decode_set_ranging_role(self, mosi, miso):
+        return "SetRangingRole", { "role": RANGING_ROLES.get(mosi[1], "ERROR") }
+
+    # 0xC0 = GetStatus()
+    @command(0xC0, "GetStatus", 1, 1, format="GetStatus()={{data.circuitMode}}, {{data.commandStatus}}", cached=True)
+    def decode_get_status(self, mosi, miso):
+        circuitMode, commandStatus = STATUS_FIELDS[miso[0]]
+        return "GetStatus", { "status": miso[0], "circuitMode": circuitMode, "commandStatus": commandStatus }
+
+    # 0xC1 = SetFs()
+    @command(0xC1, "SetFs", format="SetFs()", cached=True)
+    def decode_set_fs(self, mosi, miso):
+        return "SetFs", {}
+
+    # 0xC5 = SetCad()
+    @command(0xC5, "SetCad", format="SetCad()", cached=True)
+    def decode_set_cad(self, mosi, miso):
+        return "SetCad", {}
+
+    # 0xD1 = SetTxContinuousWave()
+    @command(0xD1, "SetTxContinuousWave", format="SetTxContinuousWave()", cached=True)
+    def decode_set_tx_continuous_wave(self, mosi, miso):
+        return "SetTxContinuousWave", {}
+
+    # 0xD2 = SetTxContinuousPreamble()
+    @command(0xD2, "SetTxContinuousPreamble", format="SetTxContinuousPreamble()", cached=True)
+    def decode_set_tx_continuous_preamble(self, mosi, miso):
+        return "SetTxContinuousPreamble", {}
+
+    # 0xD5 = SetSaveContext()
+    @command(0xD5, "SetSaveContext", format="SetSaveContext()", cached=True)
+    def decode_set_save_context(self, mosi, miso):
+        return "SetSaveContext", {}
+
+    def complete_transaction(self, end):
+        """Decode the buffered transaction ending at end and feed it to the enabled features, returns the frame(s)."""
+        resultType, data = self.get_frame_data()
+        if self.plainFrames:
+            return AnalyzerFrame(resultType, self.transaction_start_time, end, data)
+        frames = []
+        if self.exportSink is not None:
+            self.exportSink.write(self.transaction_start_time, end, resultType, self.packetType,
+                                  self.mosi, self.miso, data)
+        if self.snapshots is not None:
+            opcode = self.command.opcode if self.command is not None else None
+            self.snapshots.update(opcode, self.transaction_start_time, end, self)
+        commandFrame = self.commandFrames
+        if self.busStats is not None:
+            # Before the command frame: the summary covers the window this transaction closed
+            name = self.command.name if self.command is not None else "Unknown"
+            summary = self.busStats.update(self.transaction_start_time, end, len(self.mosi), name)
+            if summary is not None:
+                frames.append(AnalyzerFrame(*summary))
+        if self.commandFrames:
+            frameType = resultType
+            if self.statusTypes is not None and len(self.miso) > 0 and resultType in self.statusTypes:
+                frameType = self.statusTypes[resultType]
+                data["circuitMode"], data["commandStatus"] = STATUS_FIELDS[self.miso[0]]
+            if self.runs is not None:
+                key = (self.packetType, self.mosi, self.miso)
+                commandFrame, run = self.runs.update(key, frameType, self.transaction_start_time, end, data)
+                if run is not None:
+                    # The run ended before this transaction, so it goes first
+                    frames.insert(0, AnalyzerFrame(*run))
+        if commandFrame:
+            frames.append(AnalyzerFrame(
+                frameType,
+                self.transaction_start_time,
+                end,
+                data,
+            ))
+        if self.irqLatency is not None:
+            self.irqLatency.update(resultType, data, end)
+        if self.traffic is not None:
+            summary = self.traffic.update(self.mosi, len(self.mosi), len(self.miso), resultType, data,
+                                          self.transaction_start_time, end)
+            if summary is not None:
+                frames.insert(0, AnalyzerFrame(*summary))
+        if self.hops is not None and (resultType == "SetRfFrequencyChannel" or resultType == "SetRfFrequency"):
+            self.hops.update(data.get("channel"), end)
+        if self.radioModes is not None:
+            mode = self.radioModes.update(resultType, data, self.transaction_start_time, end)
+            if mode is not None and self.modeFrames:
+                frames.append(AnalyzerFrame(*mode))
+        if self.packets is not None:
+            packet = self.packets.update(resultType, data, self.transaction_start_time, end)
+            if packet is not None:
+                frames.append(AnalyzerFrame(*packet))
+        # Logic 2 takes a single frame or a list
+        return frames[0] if len(frames) == 1 else (frames or None)
 
     def handle_disable(self, frame):
         if self.is_valid_transaction():
-            result = AnalyzerFrame(
-                "SpiTransaction",
-                self.transaction_start_time,
-                frame.end_time,
-                self.get_frame_data(),
-            )
+            # One join per transaction, the result frames only append
+            self.mosi = mosi = b"".join(self.mosiParts)
+            self.miso = b"".join(self.misoParts)
+            self.command = COMMANDS.get(mosi[0]) if mosi else None
+            result = self.complete_transaction(frame.end_time)
         else:
             result = AnalyzerFrame(
                 "SpiTransactionError",
@@ -610,14 +1065,38 @@ class sx128x_in(HighLevelAnalyzer):
         )
         self.reset()
 
+    def decode_transaction(self, start, end, mosi: bytes, miso: bytes):
+        """Decode one whole CS framed transaction, for front ends that assemble the bytes themselves.
+
+        Returns what decode() returns for the transaction's disable frame."""
+        self.transaction_start_time = start
+        self.mosi = bytes(mosi)
+        self.miso = bytes(miso)
+        self.command = COMMANDS.get(self.mosi[0]) if self.mosi else None
+        result = self.complete_transaction(end)
+        self.reset()
+        return result
+
     def decode(self, frame: AnalyzerFrame):
-        if frame.type == "enable":
-            return self.handle_enable(frame)
-        elif frame.type == "result":
-            return self.handle_result(frame)
-        elif frame.type == "disable":
+        # Result frames are the bulk of the input (one per byte), so they are checked first. Result and
+        # enable frames are handled inline, only the disable frame of a transaction costs a method call.
+        frameType = frame.type
+        if frameType == "result":
+            if self.spi_enable:
+                data = frame.data
+                self.mosiParts.append(data["mosi"])
+                self.misoParts.append(data["miso"])
+            return None
+        elif frameType == "enable":
+            self.mosiParts = []
+            self.misoParts = []
+            self.spi_enable = True
+            self.error = False
+            self.transaction_start_time = frame.start_time
+            return None
+        elif frameType == "disable":
             return self.handle_disable(frame)
-        elif frame.type == "error":
+        elif frameType == "error":
             return self.handle_error(frame)
         else:
             return AnalyzerFrame(
@@ -628,3 +1107,25 @@ class sx128x_in(HighLevelAnalyzer):
                     "error_info": "Unexpected frame type from input analyzer: {}".format(frame.type)
                 }
             )
+
+# Result type -> variant with the status byte appended, GetStatus already shows it
+STATUS_RESULT_TYPES = { "Unknown": "UnknownStatus" }
+for cmd in COMMANDS.values():
+    for resultType, format in cmd.formats.items():
+        sx128x_in.result_types[resultType] = { "format": format }
+        if cmd.opcode != 0xC0:
+            STATUS_RESULT_TYPES[resultType] = resultType + "Status"
+for resultType, statusType in STATUS_RESULT_TYPES.items():
+    sx128x_in.result_types[statusType] = { "format": sx128x_in.result_types[resultType]["format"] + " [{{data.circuitMode}}, {{data.commandStatus}}]" }
+
+# Command frame result type -> run frame of its identical repetitions
+REPEATED_RESULT_TYPES = {}
+for resultType in list(sx128x_in.result_types):
+    if resultType != "SpiTransactionError":
+        REPEATED_RESULT_TYPES[resultType] = resultType + "Repeated"
+        sx128x_in.result_types[resultType + "Repeated"] = { "format": sx128x_in.result_types[resultType]["format"] + " repeated ×{{data.count}}" }
+
+sx128x_in.result_types.update(PacketTracker.result_types)
+sx128x_in.result_types.update(BusStats.result_types)
+sx128x_in.result_types.update(RadioModes.result_types)
+sx128x_in.result_types.update(TrafficCounters.result_types)
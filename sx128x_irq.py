@@ -0,0 +1,143 @@
+# SX128x IRQ register bits and IRQ latency histograms.
+#
+# IRQ words are rendered from two precomputed 256 entry tables (low and high byte), so naming the
+# flags of a GetIrqStatus costs two lookups whatever the number of bits set. Latencies are counted
+# in fixed bucket arrays, memory does not depend on the capture length.
+
+from bisect import bisect_left
+
+# Bit number -> flag name, datasheet table "IRQ Register"
+IRQ_BITS = (
+    "TxDone",
+    "RxDone",
+    "SyncWordValid",
+    "SyncWordError",
+    "HeaderValid",
+    "HeaderError",
+    "CrcError",
+    "RangingSlaveResponseDone",
+    "RangingSlaveRequestDiscard",
+    "RangingMasterResultValid",
+    "RangingMasterTimeout",
+    "RangingSlaveRequestValid",
+    "CadDone",
+    "CadDetected",
+    "RxTxTimeout",
+    "PreambleDetected/AdvancedRangingDone",
+)
+
+# GetIrqStatus bits used by the packet tracker
+IRQ_TX_DONE = 0x0001
+IRQ_RX_DONE = 0x0002
+IRQ_HEADER_ERROR = 0x0020
+IRQ_CRC_ERROR = 0x0040
+IRQ_RX_TX_TIMEOUT = 0x4000
+
+def _byte_flags(bits):
+    return tuple("|".join(bits[b] for b in range(8) if value & (1 << b)) for value in range(256))
+
+# Low/high byte of an IRQ word -> "|" separated flag names
+IRQ_FLAGS_LOW = _byte_flags(IRQ_BITS[:8])
+IRQ_FLAGS_HIGH = _byte_flags(IRQ_BITS[8:])
+
+def irq_flags(irq: int) -> str:
+    low = IRQ_FLAGS_LOW[irq & 0xFF]
+    high = IRQ_FLAGS_HIGH[irq >> 8]
+    if low and high:
+        return low + "|" + high
+    return low or high or "none"
+
+# Upper bucket edges in us, the last bucket counts everything above LATENCY_BUCKETS[-1]
+LATENCY_BUCKETS = (10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000, 200000, 500000, 1000000)
+
+# Commands that start a radio operation whose IRQs are timed
+RADIO_START_COMMANDS = ("SetTx", "SetTxAirtime", "SetRx", "SetRxDutyCycle", "SetCad")
+
+class LatencyHistogram:
+    __slots__ = ("counts", "count", "total", "minimum", "maximum")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+
+    def add(self, latency: float):
+        self.counts[bisect_left(LATENCY_BUCKETS, latency)] += 1
+        self.count += 1
+        self.total += latency
+        if self.minimum is None or latency < self.minimum:
+            self.minimum = latency
+        if self.maximum is None or latency > self.maximum:
+            self.maximum = latency
+
+    def __str__(self):
+        buckets = []
+        for i, count in enumerate(self.counts):
+            if count:
+                edge = "<={}".format(LATENCY_BUCKETS[i]) if i < len(LATENCY_BUCKETS) else ">{}".format(LATENCY_BUCKETS[-1])
+                buckets.append("{}:{}".format(edge, count))
+        return "n={} min={:.1f} avg={:.1f} max={:.1f} us [{}]".format(
+            self.count, self.minimum, self.total / self.count, self.maximum, " ".join(buckets))
+
+class IrqLatency:
+    """Per IRQ source latency histograms fed with the decoded transactions.
+
+    raised: end of the SetTx/SetRx/SetRxDutyCycle/SetCad -> end of the first GetIrqStatus showing the flag
+    service: end of the first GetIrqStatus showing the flag -> end of the ClrIrqStatus clearing it"""
+
+    def __init__(self):
+        self.raised = [LatencyHistogram() for _ in IRQ_BITS]
+        self.service = [LatencyHistogram() for _ in IRQ_BITS]
+        # End time of the command that started the current radio operation
+        self.radioStart = None
+        # Flags not seen yet since radioStart
+        self.waiting = 0
+        # Flags seen set and not cleared yet, with the time they were first seen
+        self.pending = 0
+        self.seen = [None] * len(IRQ_BITS)
+
+    def update(self, resultType: str, data: dict, end):
+        if resultType == "GetIrqStatus":
+            irq = data["irqStatus"]
+            new = irq & self.waiting
+            if new:
+                self.waiting &= ~new
+                latency = self.elapsed(self.radioStart, end)
+                for bit in self.bits(new):
+                    self.raised[bit].add(latency)
+            new = irq & ~self.pending
+            if new:
+                self.pending |= new
+                for bit in self.bits(new):
+                    self.seen[bit] = end
+        elif resultType == "ClrIrqStatus":
+            cleared = data["irqMask"] & self.pending
+            if cleared:
+                self.pending &= ~cleared
+                for bit in self.bits(cleared):
+                    self.service[bit].add(self.elapsed(self.seen[bit], end))
+        elif resultType in RADIO_START_COMMANDS:
+            self.radioStart = end
+            self.waiting = 0xFFFF
+
+    def summary(self):
+        lines = []
+        for bit, name in enumerate(IRQ_BITS):
+            if self.raised[bit].count:
+                lines.append("IRQ {} raised: {}".format(name, self.raised[bit]))
+            if self.service[bit].count:
+                lines.append("IRQ {} service: {}".format(name, self.service[bit]))
+        return lines
+
+    @staticmethod
+    def bits(mask: int):
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
+
+    @staticmethod
+    def elapsed(start, end):
+        return float(end - start) * 1e6
@@ -0,0 +1,188 @@
+# Radio operating mode timeline rebuilt from the mode commands and the polled IRQ status.
+#
+# Transitions come from a table precomputed for every (mode, event) pair, events are the mode
+# commands plus the IRQs that end a TX/RX/CAD operation. Commands take effect at the end of their
+# transaction, IRQ events when the GetIrqStatus showing them ends (the host cannot know earlier).
+# The time spent in each mode is summed up for the whole capture.
+
+from enum import Enum
+
+from sx128x_irq import IRQ_TX_DONE, IRQ_RX_DONE, IRQ_RX_TX_TIMEOUT
+
+# GetIrqStatus bits that end a CAD
+IRQ_CAD_DONE = 0x1000
+
+# SetTx/SetRx/SetRxDutyCycle periodBase -> step in us
+PERIOD_BASES = { 0x00: 15.625, 0x01: 62.5, 0x02: 1000, 0x03: 4000 }
+
+# SetRx periodBaseCount values without a timeout
+RX_SINGLE = 0x0000
+RX_CONTINUOUS = 0xFFFF
+
+class RadioMode(Enum):
+    UNKNOWN = 0
+    SLEEP = 1
+    STDBY_RC = 2
+    STDBY_XOSC = 3
+    FS = 4
+    TX = 5
+    RX = 6
+    RX_DUTY_CYCLE = 7
+    CAD = 8
+    TX_CONTINUOUS = 9
+
+# Symbolic transition targets resolved with the SetAutoFS/SetAutoTx/SetRx configuration
+RETURN = "return"
+AFTER_RX = "after RX"
+
+# Mode command result type -> event
+COMMAND_EVENTS = {
+    "SetSleep": "SetSleep",
+    "SetFs": "SetFs",
+    "SetTx": "SetTx",
+    "SetTxAirtime": "SetTx",
+    "SetRx": "SetRx",
+    "SetRxDutyCycle": "SetRxDutyCycle",
+    "SetCad": "SetCad",
+    "SetTxContinuousWave": "SetTxContinuous",
+    "SetTxContinuousPreamble": "SetTxContinuous",
+}
+
+# Mode command event -> mode entered, accepted in every mode the chip is awake in
+COMMAND_TARGETS = {
+    "SetSleep": RadioMode.SLEEP,
+    "SetStandbyRC": RadioMode.STDBY_RC,
+    "SetStandbyXOSC": RadioMode.STDBY_XOSC,
+    "SetFs": RadioMode.FS,
+    "SetTx": RadioMode.TX,
+    "SetRx": RadioMode.RX,
+    "SetRxDutyCycle": RadioMode.RX_DUTY_CYCLE,
+    "SetCad": RadioMode.CAD,
+    "SetTxContinuous": RadioMode.TX_CONTINUOUS,
+}
+
+# (mode, event) -> RadioMode, RETURN or AFTER_RX; pairs that are absent leave the mode unchanged
+TRANSITIONS = {}
+for mode in RadioMode:
+    if mode != RadioMode.SLEEP:
+        for event, target in COMMAND_TARGETS.items():
+            TRANSITIONS[(mode, event)] = target
+TRANSITIONS.update({
+    (RadioMode.TX, "TxDone"): RETURN,
+    (RadioMode.TX, "Timeout"): RETURN,
+    (RadioMode.RX, "RxDone"): AFTER_RX,
+    (RadioMode.RX, "Timeout"): RETURN,
+    (RadioMode.RX_DUTY_CYCLE, "RxDone"): RETURN,
+    (RadioMode.RX_DUTY_CYCLE, "Timeout"): RETURN,
+    (RadioMode.CAD, "CadDone"): RETURN,
+})
+
+def period_text(periodBase: int, periodBaseCount: int) -> str:
+    return "{:g} us".format(PERIOD_BASES[periodBase & 0x03] * periodBaseCount)
+
+class RadioModes:
+    result_types = {
+        "RadioMode": {
+            "format": "{{data.mode}} {{data.dwell}} us, timeout {{data.timeout}} -> {{data.next}}"
+        },
+    }
+
+    def __init__(self):
+        self.mode = RadioMode.UNKNOWN
+        # Time the current mode was entered, None before the first transition
+        self.entered = None
+        self.timeout = "n/a"
+        self.autoFs = False
+        self.autoTx = False
+        self.rxContinuous = False
+        # RadioMode -> [entries, us]
+        self.dwell = { mode: [0, 0.0] for mode in RadioMode }
+
+    def update(self, resultType: str, data: dict, start, end):
+        """Feed one decoded transaction, returns the (result type, start, end, data) frame of the mode it ended."""
+        if self.mode == RadioMode.SLEEP:
+            # Any transaction wakes the chip up into STDBY_RC. A mode command in the same transaction
+            # ends that STDBY_RC a few us later, its dwell is accounted but gets no frame of its own.
+            frame = self.enter(RadioMode.STDBY_RC, "n/a", start)
+            self.transition(resultType, data, end)
+            return frame
+        return self.transition(resultType, data, end)
+
+    def transition(self, resultType: str, data: dict, time):
+        if resultType == "GetIrqStatus":
+            irq = data["irqStatus"]
+            if irq & IRQ_RX_TX_TIMEOUT:
+                event = "Timeout"
+            elif irq & IRQ_TX_DONE:
+                event = "TxDone"
+            elif irq & IRQ_RX_DONE:
+                event = "RxDone"
+            elif irq & IRQ_CAD_DONE:
+                event = "CadDone"
+            else:
+                return None
+        elif resultType == "SetStandby":
+            event = "SetStandby" + data["standbyConfig"]
+        elif resultType == "SetAutoFS":
+            self.autoFs = data["enable"] == "enable"
+            return None
+        elif resultType == "SetAutoTx":
+            self.autoTx = data["time"] != 0
+            return None
+        else:
+            event = COMMAND_EVENTS.get(resultType)
+            if event is None:
+                return None
+
+        target = TRANSITIONS.get((self.mode, event))
+        if target is None:
+            return None
+        if target == AFTER_RX:
+            if self.rxContinuous:
+                return None
+            target = RadioMode.TX if self.autoTx else RETURN
+        if target == RETURN:
+            target = RadioMode.FS if self.autoFs else RadioMode.STDBY_RC
+
+        timeout = "n/a"
+        if event == "SetTx" or event == "SetRx":
+            count = data["periodBaseCount"]
+            self.rxContinuous = event == "SetRx" and count == RX_CONTINUOUS
+            if self.rxContinuous:
+                timeout = "continuous"
+            elif count == RX_SINGLE:
+                timeout = "none"
+            else:
+                timeout = period_text(data["periodBase"], count)
+        elif event == "SetRxDutyCycle":
+            self.rxContinuous = False
+            timeout = "RX {}, sleep {}".format(
+                period_text(data["periodBase"], data["rxPeriodBaseCount"]),
+                period_text(data["sleepPeriodBase"], data["sleepPeriodBaseCount"]))
+        return self.enter(target, timeout, time)
+
+    def enter(self, mode: RadioMode, timeout: str, time):
+        frame = None
+        if self.entered is not None:
+            dwell = round(float(time - self.entered) * 1e6, 1)
+            entry = self.dwell[self.mode]
+            entry[0] += 1
+            entry[1] += dwell
+            frame = ("RadioMode", self.entered, time, {
+                "mode": self.mode.name,
+                "dwell": dwell,
+                "timeout": self.timeout,
+                "next": mode.name,
+            })
+        self.mode = mode
+        self.entered = time
+        self.timeout = timeout
+        return frame
+
+    def summary(self):
+        total = sum(us for _, us in self.dwell.values())
+        lines = []
+        for mode, (entries, us) in self.dwell.items():
+            if entries:
+                lines.append("Radio mode {}: {} times, {:.1f} us ({:.1f}%)".format(mode.name, entries, us, us / total * 100 if total else 0.0))
+        return lines
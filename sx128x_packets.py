@@ -0,0 +1,155 @@
+# Packet-level reassembly of the command sequences a host uses to send or receive one packet:
+#
+#   TX: WriteBuffer... -> SetTx -> GetIrqStatus(TxDone or RxTxTimeout)
+#   RX: SetRx -> GetIrqStatus(RxDone or RxTxTimeout) -> GetRxBufferStatus -> ReadBuffer -> GetPacketStatus
+#
+# The tracker is a small state machine fed with the (result type, data) pairs produced by
+# sx128x_in.get_frame_data. It keeps a handful of scalars for the packet in flight, so memory use
+# does not depend on the capture length.
+
+from enum import Enum
+
+from sx128x_irq import IRQ_TX_DONE, IRQ_RX_DONE, IRQ_HEADER_ERROR, IRQ_CRC_ERROR, IRQ_RX_TX_TIMEOUT
+
+# SetRx periodBaseCount for continuous receive, the radio stays in RX after every RxDone
+RX_CONTINUOUS = 0xFFFF
+
+class PacketState(Enum):
+    IDLE = 0
+    TX_LOADED = 1
+    TX_ACTIVE = 2
+    RX_ACTIVE = 3
+    RX_DONE = 4
+
+class PacketTracker:
+    # Result type -> Logic 2 format string of the emitted packet frames
+    result_types = {
+        "TxPacket": {
+            "format": "TX packet {{data.status}}: {{data.length}} bytes, airtime {{data.airtime}} us, latency {{data.latency}} us, total {{data.duration}} us"
+        },
+        "RxPacket": {
+            "format": "RX packet {{data.status}}: {{data.length}} bytes, RSSI {{data.rssi}} dBm, SNR {{data.snr}} dB, latency {{data.latency}} us, total {{data.duration}} us"
+        },
+    }
+
+    def __init__(self):
+        self.state = PacketState.IDLE
+        self.rxContinuous = False
+        # Length of the last loaded TX payload, reused when SetTx is sent without a new WriteBuffer
+        self.txLength = 0
+        self.clear()
+
+    def clear(self):
+        # Start time of the first command of the packet in flight
+        self.start = None
+        # End time of the SetTx/SetRx that started the radio operation
+        self.radioStart = None
+        # End time of the last command that belongs to the packet in flight
+        self.end = None
+        self.latency = None
+        self.length = 0
+        self.status = "OK"
+        self.rssi = "n/a"
+        self.snr = "n/a"
+        # Expected time on air of the SetTx, compare with the SetTx -> TxDone latency
+        self.airtime = "n/a"
+
+    def update(self, resultType: str, data: dict, start, end):
+        """Feed one decoded transaction, returns (result type, start, end, data) when a packet completes."""
+        state = self.state
+        packet = None
+
+        if resultType == "GetIrqStatus":
+            irq = data["irqStatus"]
+            if state == PacketState.TX_ACTIVE:
+                if irq & IRQ_TX_DONE:
+                    self.latency = self.elapsed(self.radioStart, end)
+                    return self.emit("TxPacket", end)
+                if irq & IRQ_RX_TX_TIMEOUT:
+                    self.status = "timeout"
+                    self.latency = self.elapsed(self.radioStart, end)
+                    return self.emit("TxPacket", end)
+            elif state == PacketState.RX_ACTIVE:
+                if irq & IRQ_RX_DONE:
+                    self.latency = self.elapsed(self.radioStart, end)
+                    self.end = end
+                    if irq & IRQ_CRC_ERROR:
+                        self.status = "CRC error"
+                    elif irq & IRQ_HEADER_ERROR:
+                        self.status = "header error"
+                    self.state = PacketState.RX_DONE
+                elif irq & IRQ_RX_TX_TIMEOUT:
+                    self.status = "timeout"
+                    self.latency = self.elapsed(self.radioStart, end)
+                    return self.emit("RxPacket", end)
+            return None
+
+        if state == PacketState.RX_DONE:
+            if resultType == "GetRxBufferStatus":
+                self.length = data["rxPayloadLength"]
+                self.end = end
+                return None
+            if resultType in ("ReadBuffer", "ReadBufferRegion", "ReadBufferDecoded"):
+                self.end = end
+                return None
+            if resultType == "GetPacketStatusLora" or resultType == "GetPacketStatusGfsk":
+                self.rssi = data["rssiSync"]
+                self.snr = data.get("snr", "n/a")
+                return self.emit("RxPacket", end)
+            if resultType in ("WriteBuffer", "WriteBufferDecoded", "SetTx", "SetTxAirtime", "SetRx"):
+                # The host moved on without reading the packet status
+                packet = self.emit("RxPacket", self.end)
+                state = self.state
+
+        if resultType == "WriteBuffer" or resultType == "WriteBufferDecoded":
+            if state != PacketState.TX_LOADED:
+                self.clear()
+                self.start = start
+                self.length = 0
+                self.state = PacketState.TX_LOADED
+            self.length += data["length"]
+            self.txLength = self.length
+        elif resultType == "SetTx" or resultType == "SetTxAirtime":
+            if state != PacketState.TX_LOADED:
+                self.clear()
+                self.start = start
+                self.length = self.txLength
+            self.radioStart = end
+            self.airtime = data.get("timeOnAir", "n/a")
+            self.state = PacketState.TX_ACTIVE
+        elif resultType == "SetRx":
+            self.clear()
+            self.start = start
+            self.radioStart = end
+            self.rxContinuous = data["periodBaseCount"] == RX_CONTINUOUS
+            self.state = PacketState.RX_ACTIVE
+        return packet
+
+    def emit(self, resultType: str, end):
+        data = {
+            "status": self.status,
+            "length": self.length,
+            "latency": self.latency if self.latency is not None else "n/a",
+            "duration": self.elapsed(self.start, end),
+        }
+        if resultType == "RxPacket":
+            data["rssi"] = self.rssi
+            data["snr"] = self.snr
+        else:
+            data["airtime"] = self.airtime
+        packet = (resultType, self.start, end, data)
+        if resultType == "RxPacket" and self.rxContinuous:
+            # Continuous RX: the next packet is received without a new SetRx
+            self.clear()
+            self.start = end
+            self.radioStart = end
+            self.state = PacketState.RX_ACTIVE
+        else:
+            self.clear()
+            self.state = PacketState.IDLE
+        return packet
+
+    @staticmethod
+    def elapsed(start, end):
+        # Microseconds between two capture times, rounded to 0.1 us
+        return round(float(end - start) * 1e6, 1)
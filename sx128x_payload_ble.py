@@ -0,0 +1,33 @@
+# BLE advertising channel PDU (Core specification Vol 6 Part B 2.3): 2 byte header, AdvA and the payload.
+
+PDU_TYPES = {
+    0x0: "ADV_IND",
+    0x1: "ADV_DIRECT_IND",
+    0x2: "ADV_NONCONN_IND",
+    0x3: "SCAN_REQ",
+    0x4: "SCAN_RSP",
+    0x5: "CONNECT_IND",
+    0x6: "ADV_SCAN_IND",
+    0x7: "ADV_EXT_IND",
+}
+
+def address(data) -> str:
+    # Device addresses are sent least significant byte first
+    return ":".join("{:02X}".format(b) for b in reversed(data))
+
+def decode_pdu(payload: bytes):
+    if len(payload) < 2:
+        return None
+    header = payload[0]
+    length = payload[1]
+    fields = {
+        "pduType": PDU_TYPES.get(header & 0x0F, "Reserved"),
+        "txAdd": "random" if header & 0x40 else "public",
+        "length": length,
+    }
+    if len(payload) >= 8:
+        fields["advA"] = address(payload[2:8])
+    if header & 0x0F in (0x1, 0x3, 0x5) and len(payload) >= 14:
+        # Second address: TargetA (ADV_DIRECT_IND), AdvA of the advertiser (SCAN_REQ, CONNECT_IND)
+        fields["peerAddress"] = address(payload[8:14])
+    return fields
@@ -0,0 +1,31 @@
+# ExpressLRS 3.x 8 byte OTA packet (OTA_Packet4_s): type and CRC high bits, 6 byte body, CRC low byte.
+
+OTA_TYPES = { 0: "RC_DATA", 1: "DATA", 2: "SYNC", 3: "LINK_STATS" }
+
+# OTA_Packet4_s is 8 bytes, longer payloads are full resolution 13 byte packets
+OTA4_LENGTH = 8
+
+def decode_ota(payload: bytes):
+    if len(payload) != OTA4_LENGTH:
+        return None
+    packetType = payload[0] & 0x03
+    fields = {
+        "otaType": OTA_TYPES[packetType],
+        "crc": ((payload[0] >> 2) << 8) | payload[7],
+    }
+    if packetType == 0:
+        # Four 10 bit channels packed little endian in 5 bytes, then the switch byte
+        packed = int.from_bytes(payload[1:6], "little")
+        for i in range(4):
+            fields["ch{}".format(i + 1)] = (packed >> (10 * i)) & 0x3FF
+        fields["switches"] = payload[6] & 0x7F
+        fields["armed"] = payload[6] >> 7
+    elif packetType == 2:
+        fields["fhssIndex"] = payload[1]
+        fields["nonce"] = payload[2]
+        # switchEncMode:1, newTlmRatio:3, rateIndex:4 from the least significant bit up
+        fields["tlmRatio"] = (payload[3] >> 1) & 0x07
+        fields["rateIndex"] = payload[3] >> 4
+        # UID3..UID5, the last three bytes of the binding UID
+        fields["uid"] = payload[4:7].hex()
+    return fields
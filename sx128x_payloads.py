@@ -0,0 +1,54 @@
+# Payload decoder registry for WriteBuffer/ReadBuffer contents.
+#
+# A protocol maps packet types to "module:function" decoders that are imported on first use, so
+# loading the analyzer does not import any of them. A decoder takes the payload bytes and returns
+# a dict of str/int/float fields, or None when the payload is not one of its packets.
+
+import importlib
+
+# "Payload protocol" setting choice -> packet type name -> decoder, "Custom" uses the custom decoder setting
+PAYLOAD_PROTOCOLS = {
+    "Raw": {},
+    "BLE PDU": { "BLE": "sx128x_payload_ble:decode_pdu" },
+    "ExpressLRS OTA": { "LORA": "sx128x_payload_elrs:decode_ota", "FLRC": "sx128x_payload_elrs:decode_ota" },
+    "Custom": None,
+}
+
+# Packet types a custom decoder is used for
+CUSTOM_PACKET_TYPES = ("GFSK", "LORA", "RANGING", "FLRC", "BLE")
+
+class PayloadDecoders:
+    def __init__(self, protocol: str, custom: str = ""):
+        specs = PAYLOAD_PROTOCOLS[protocol]
+        if specs is None:
+            specs = { packetType: custom for packetType in CUSTOM_PACKET_TYPES } if custom else {}
+        self.specs = specs
+        # Packet type name -> loaded decoder function, None when it failed to load
+        self.loaded = {}
+
+    def decoder(self, packetType: str):
+        if packetType in self.loaded:
+            return self.loaded[packetType]
+        spec = self.specs.get(packetType)
+        function = None
+        if spec is not None:
+            try:
+                moduleName, _, functionName = spec.partition(":")
+                function = getattr(importlib.import_module(moduleName), functionName or "decode")
+            except Exception as e:
+                print("Payload decoder {} could not be loaded: {}".format(spec, e))
+        self.loaded[packetType] = function
+        return function
+
+    def decode(self, packetType: str, payload: bytes):
+        """(text, fields) of the payload, None when no decoder applies or the payload is not recognized."""
+        decoder = self.decoder(packetType)
+        if decoder is None:
+            return None
+        try:
+            fields = decoder(payload)
+        except Exception as e:
+            fields = { "error": "{}: {}".format(type(e).__name__, e) }
+        if not fields:
+            return None
+        return ", ".join("{}={}".format(key, value) for key, value in fields.items()), fields
@@ -0,0 +1,94 @@
+# Opt-in decoder profiling: call count and wall-clock cost per input frame type and per command decoder.
+#
+# The profiler replaces the analyzer's decode, decode_transaction and get_frame_data with timing wrappers on the instance,
+# so an analyzer without profiling runs the unmodified methods and pays nothing for the feature.
+
+import os
+import weakref
+from time import perf_counter_ns
+
+# Environment switch, "1" prints the summary, any other value is a file the summary is appended to
+PROFILE_ENVIRONMENT = "SX128X_PROFILE"
+
+class Profiler:
+    def __init__(self, path=None):
+        # File the report is appended to by finish() (one block per analyzer instance), printed when None
+        self.path = path
+        # "frame <type>" / "opcode <name>" -> [calls, ns]
+        self.counters = {}
+
+    @classmethod
+    def from_environment(cls, setting: str):
+        """Profiler for the profiling setting and SX128X_PROFILE, None when both are off."""
+        value = os.environ.get(PROFILE_ENVIRONMENT, "")
+        if value not in ("", "0"):
+            return cls(None if value == "1" else value)
+        if setting != "Off":
+            return cls()
+        return None
+
+    def install(self, analyzer):
+        # The wrappers are stored on the analyzer, so they reach it through a weak reference and the
+        # class functions instead of bound methods, which would keep the analyzer in a reference cycle
+        analyzerRef = weakref.ref(analyzer)
+        analyzerType = type(analyzer)
+        decode = analyzerType.decode
+        decode_transaction = analyzerType.decode_transaction
+        get_frame_data = analyzerType.get_frame_data
+        counters = self.counters
+
+        def counter(key):
+            entry = counters.get(key)
+            if entry is None:
+                entry = counters[key] = [0, 0]
+            return entry
+
+        def timed_decode(frame):
+            start = perf_counter_ns()
+            try:
+                return decode(analyzerRef(), frame)
+            finally:
+                entry = counter("frame " + frame.type)
+                entry[0] += 1
+                entry[1] += perf_counter_ns() - start
+
+        def timed_decode_transaction(start, end, mosi, miso):
+            # Front ends that assemble whole transactions bypass decode(), they are counted as one frame type
+            startNs = perf_counter_ns()
+            try:
+                return decode_transaction(analyzerRef(), start, end, mosi, miso)
+            finally:
+                entry = counter("frame transaction")
+                entry[0] += 1
+                entry[1] += perf_counter_ns() - startNs
+
+        def timed_get_frame_data():
+            instance = analyzerRef()
+            cmd = instance.command
+            start = perf_counter_ns()
+            try:
+                return get_frame_data(instance)
+            finally:
+                entry = counter("opcode " + (cmd.name if cmd is not None else "Unknown"))
+                entry[0] += 1
+                entry[1] += perf_counter_ns() - start
+
+        analyzer.decode = timed_decode
+        analyzer.decode_transaction = timed_decode_transaction
+        analyzer.get_frame_data = timed_get_frame_data
+
+    def report(self):
+        # Frame types include the decoder time of the transactions they complete
+        lines = []
+        for key, (calls, ns) in sorted(self.counters.items(), key=lambda item: -item[1][1]):
+            lines.append("Profile {}: {} calls, {:.3f} ms total, {:.2f} us/call".format(key, calls, ns / 1e6, ns / calls / 1e3))
+        return lines
+
+    def finish(self):
+        lines = self.report()
+        if self.path is None:
+            for line in lines:
+                print(line)
+        else:
+            with open(self.path, "a") as f:
+                f.write("\n".join(["Profile of analyzer pid {}".format(os.getpid())] + lines) + "\n")
@@ -0,0 +1,142 @@
+# Ranging results read back from the RangingResult registers, converted to distance.
+#
+# Hosts (the Semtech driver among them) select the result type in RangingResultMux, freeze the
+# result and read the three RangingResult bytes, often as three single byte ReadRegister. The bytes
+# are collected until all three were read, then converted with the factor of the current SF/BW.
+
+import math
+from collections import deque
+
+RANGING_RESULT_MUX = 0x0924
+RANGING_CALIBRATION = 0x092C
+RANGING_RESULT = 0x0961
+RANGING_RESULT_LENGTH = 3
+
+# RangingResultMux bits 5:4
+RANGING_RESULT_TYPES = ("raw", "averaged", "debiased", "filtered")
+
+# Processed (non raw) results are in units of 0.2 m
+PROCESSED_METERS_PER_LSB = 0.2
+
+# Recent results outliers are judged against (kept whether or not they were outliers, so the median
+# follows a moved device within half a window), the results needed before outliers are counted, and
+# the distance from the median in robust standard deviations (1.4826 * MAD) that makes one
+OUTLIER_WINDOW = 16
+OUTLIER_MIN_SAMPLES = 10
+OUTLIER_SIGMA = 3.0
+MAD_TO_DEVIATION = 1.4826
+
+# Lower bound of the standard deviation used for outliers, so a run of identical results does not
+# turn every later change into an outlier
+OUTLIER_MIN_DEVIATION = 1.0
+
+# Semtech ranging demo default RangingCalibration per bandwidth (kHz), for SF5..SF10
+DEFAULT_CALIBRATIONS = {
+    406.25: (10299, 10271, 10244, 10242, 10230, 10246),
+    812.5: (11486, 11474, 11453, 11426, 11417, 11401),
+    1625.0: (13308, 13493, 13528, 13515, 13430, 13376),
+}
+
+# Nominal bandwidth in Hz the raw result is scaled with
+NOMINAL_BANDWIDTHS = { 406.25: 400000, 812.5: 800000, 1625.0: 1600000 }
+
+# (SF, BW kHz) -> (meters per raw LSB, default calibration), computed once for every ranging SF/BW pair:
+# distance [m] = result * 150 / (2^12 * BW [MHz])
+RANGING_FACTORS = {}
+for _bandwidth, _calibrations in DEFAULT_CALIBRATIONS.items():
+    for _sf, _calibration in zip(range(5, 11), _calibrations):
+        RANGING_FACTORS[(_sf, _bandwidth)] = (150 / (4096 * NOMINAL_BANDWIDTHS[_bandwidth] / 1e6), _calibration)
+
+def median_of(values) -> float:
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2
+
+class RangingTracker:
+    def __init__(self):
+        # RangingResult byte index -> value read since the last complete result
+        self.pending = {}
+        # (SF, BW) -> calibration written by the host while that SF/BW was set
+        self.calibrations = {}
+        self.count = 0
+        self.mean = 0.0
+        self.squares = 0.0
+        self.outliers = 0
+        self.recent = deque(maxlen=OUTLIER_WINDOW)
+
+    def read(self, address: int, data, registers: dict, modulation):
+        """Ranging result fields once the last RangingResult byte was read, else None.
+
+        registers is the shadow register space (for the mux and calibration), modulation the last
+        ("RANGING", (SF, BW, CR)) of the analyzer."""
+        first = max(address, RANGING_RESULT)
+        last = min(address + len(data), RANGING_RESULT + RANGING_RESULT_LENGTH)
+        if first >= last:
+            return None
+        for a in range(first, last):
+            self.pending[a - RANGING_RESULT] = data[a - address]
+        if len(self.pending) < RANGING_RESULT_LENGTH:
+            return None
+        value = (self.pending[0] << 16) | (self.pending[1] << 8) | self.pending[2]
+        self.pending.clear()
+
+        resultType = RANGING_RESULT_TYPES[(registers.get(RANGING_RESULT_MUX, 0) >> 4) & 0x03]
+        fields = { "rangingType": resultType, "rangingValue": value, "distance": "n/a", "calibration": "n/a" }
+        factors = None
+        if modulation is not None and modulation[0] == "RANGING":
+            sf, bandwidth, _ = modulation[1]
+            factors = RANGING_FACTORS.get((sf, bandwidth))
+        if resultType == "raw":
+            if factors is None:
+                return fields
+            # 24 bit two's complement
+            if value & 0x800000:
+                value -= 1 << 24
+            distance = value * factors[0]
+        else:
+            distance = value * PROCESSED_METERS_PER_LSB
+        if factors is not None:
+            fields["calibration"] = self.calibration(sf, bandwidth, registers, factors[1])
+        fields["distance"] = round(distance, 2)
+        self.add(distance)
+        return fields
+
+    def calibration(self, sf, bandwidth, registers: dict, default: int) -> str:
+        high = registers.get(RANGING_CALIBRATION)
+        low = registers.get(RANGING_CALIBRATION + 1)
+        if high is None or low is None:
+            return "{} (default)".format(default)
+        written = (high << 8) | low
+        self.calibrations[(sf, bandwidth)] = written
+        return "{} ({})".format(written, "default" if written == default else "custom")
+
+    def add(self, distance: float):
+        # Outliers against the median and MAD of the recent results are counted but kept out of the
+        # Welford running mean/variance, so a static soak test reports the jitter of the good exchanges
+        recent = self.recent
+        outlier = False
+        if len(recent) >= OUTLIER_MIN_SAMPLES:
+            median = median_of(recent)
+            deviation = max(MAD_TO_DEVIATION * median_of([abs(d - median) for d in recent]), OUTLIER_MIN_DEVIATION)
+            outlier = abs(distance - median) > OUTLIER_SIGMA * deviation
+        recent.append(distance)
+        if outlier:
+            self.outliers += 1
+            return
+        self.count += 1
+        delta = distance - self.mean
+        self.mean += delta / self.count
+        self.squares += delta * (distance - self.mean)
+
+    def summary(self):
+        if self.count == 0:
+            return []
+        total = self.count + self.outliers
+        lines = ["Ranging: {} results, mean {:.2f} m, jitter (std dev) {:.2f} m, {} outliers ({:.1f}%), median of last {} {:.2f} m".format(
+            total, self.mean, math.sqrt(self.squares / self.count), self.outliers, self.outliers / total * 100,
+            len(self.recent), median_of(self.recent))]
+        for (sf, bandwidth), calibration in sorted(self.calibrations.items()):
+            lines.append("Ranging calibration SF{} BW {} kHz: {}".format(sf, bandwidth, calibration))
+        return lines
@@ -0,0 +1,69 @@
+# SX1280/SX1281 register map for naming WriteRegister/ReadRegister accesses.
+#
+# The map is sorted into an interval index once at import. An access [address, address + n)
+# is resolved with one bisect plus a walk over the registers it overlaps, so a burst write that
+# spans several registers names each of them.
+
+from bisect import bisect_right
+
+# (address, length in bytes, name, fields); multi-byte registers are big endian,
+# fields are (name, shift, width) inside single byte registers
+REGISTER_MAP = (
+    (0x0153, 2, "FirmwareVersion", ()),
+    (0x0891, 1, "RxGain", (("Sensitivity", 6, 2),)),
+    (0x0895, 1, "ManualGainSetting", ()),
+    (0x089E, 1, "LnaGainValue", ()),
+    (0x089F, 1, "LnaGainControl", ()),
+    (0x08C2, 1, "SynchPeakAttenuation", ()),
+    (0x0912, 4, "RangingRequestAddress", ()),
+    (0x0916, 4, "RangingDeviceAddress", ()),
+    (0x091E, 1, "RangingFilterWindowSize", ()),
+    (0x0923, 1, "ResetRangingFilter", ()),
+    (0x0924, 1, "RangingResultMux", (("RangingResultType", 4, 2),)),
+    (0x0925, 1, "SfAdditionalConfiguration", ()),
+    (0x092C, 2, "RangingCalibration", ()),
+    (0x0931, 1, "RangingIdCheckLength", ()),
+    (0x093C, 1, "FrequencyErrorCorrection", ()),
+    (0x0944, 2, "LoRaSyncWord", ()),
+    (0x0954, 3, "FrequencyErrorIndicator", ()),
+    (0x0961, 3, "RangingResult", ()),
+    (0x0964, 1, "RangingRssi", ()),
+    (0x097F, 1, "FreezeRangingResult", ()),
+    (0x09C1, 1, "PacketPreambleSettings", ()),
+    (0x09C5, 1, "WhiteningInitialValue", ()),
+    (0x09C6, 2, "CrcPolynomial", ()),
+    (0x09C8, 2, "CrcInitialValue", ()),
+    (0x09CD, 1, "SyncAddressControl", ()),
+    (0x09CE, 5, "SyncAddress1", ()),
+    (0x09D3, 5, "SyncAddress2", ()),
+    (0x09D8, 5, "SyncAddress3", ()),
+)
+
+# Interval index: sorted start addresses and the matching (start, end, name, fields)
+REGISTER_TABLE = sorted((address, address + length, name, fields) for address, length, name, fields in REGISTER_MAP)
+REGISTER_STARTS = [register[0] for register in REGISTER_TABLE]
+
+def register_names(address: int, data) -> str:
+    """Named registers covered by data accessed at address, e.g. "CrcPolynomial=0x1021", "" when none.
+
+    A partially covered register is shown with the covered byte range, "SyncAddress1[1:3]=0x...."."""
+    end = address + len(data)
+    # Last register starting at or before address may still overlap it
+    i = bisect_right(REGISTER_STARTS, address) - 1
+    if i < 0 or REGISTER_TABLE[i][1] <= address:
+        i += 1
+    names = []
+    while i < len(REGISTER_TABLE) and REGISTER_TABLE[i][0] < end:
+        start, stop, name, fields = REGISTER_TABLE[i]
+        first = max(start, address)
+        last = min(stop, end)
+        value = data[first - address:last - address]
+        if first == start and last == stop:
+            text = name + "=0x" + value.hex()
+            if fields:
+                text += "(" + ",".join("{}={}".format(field, (value[0] >> shift) & ((1 << width) - 1)) for field, shift, width in fields) + ")"
+        else:
+            text = "{}[{}:{}]=0x{}".format(name, first - start, last - start, value.hex())
+        names.append(text)
+        i += 1
+    return ", ".join(names)
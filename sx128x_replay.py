@@ -0,0 +1,394 @@
+# Offline replay of Saleae Logic 2 SPI analyzer exports through the sx128x_in HLA.
+#
+# Usage: python sx128x_replay.py capture.csv -o decoded.csv [-j JOBS] [--shards N] [-s NAME=VALUE]...
+#                               [--start SECONDS [--state SNAPSHOTS]]
+#
+# The input is the CSV written by "Export Table"/"Export to TXT/CSV" on the SPI analyzer
+# (columns name, type, start_time, duration, mosi, miso). It is split into shards at CS enable
+# boundaries and the shards are decoded in parallel by a process pool. The state carried from one
+# transaction to the next is small (sx128x_in.get_state(): packet configuration, shadow buffer and
+# registers), so a sequential pre-scan decodes just
+# the transactions that change it to know the state every shard starts with.
+#
+# --start decodes from a point in the capture (seconds after its first row). The rows before it are
+# skipped with a binary search on the file, with --state the pre-scan starts at the last decoder
+# state snapshot before that point instead of at the beginning of the capture.
+
+import argparse
+import contextlib
+import csv
+import json
+import os
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import saleae.analyzers
+except ImportError:
+    # Outside of Logic 2, fall back to the bundled stand-in of the extension API
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "stubs"))
+
+from saleae.analyzers import AnalyzerFrame
+from sx128x_in import sx128x_in, EXPORT_DEFAULT_FILES, CHECKPOINT_DEFAULT_FILE, DECODE_CACHE_SIZES
+from sx128x_state import STATE_OPCODES, SHADOW_OPCODES, load_snapshot, merge_snapshots
+from sx128x_traffic import merge_dumps, write_dump
+from sx128x_cache import merged_summary
+
+# Opcodes the pre-scan decodes, the ones that change the get_state() snapshot
+PRESCAN_OPCODES = STATE_OPCODES | SHADOW_OPCODES
+
+# Settings that seed the state, applied to the pre-scan like to the shards
+SEED_SETTINGS = ("initial_packet_type", "state_file")
+
+# Setting -> the values that can be decoded in shards, for the features whose output depends on
+# transactions before the current one beyond the get_state() snapshot (packets, radio modes, bus and
+# traffic windows, runs, IRQ latencies, hop statistics). A shard would start them from scratch and lose what spans its boundary, so
+# these captures are decoded in a single shard.
+SEQUENTIAL_SETTINGS = {
+    "packet_frames": ("Off",),
+    "radio_modes": ("Off",),
+    "bus_stats": ("Off",),
+    "coalesce": ("Off",),
+    "traffic_stats": ("Off", "Dump only"),
+    "irq_latency": ("Off",),
+    "channel_plan": ("Off",),
+}
+
+# Lower-cased export column name -> field, Logic 2 versions differ in spelling
+COLUMNS = {
+    "type": "type",
+    "start_time": "start_time",
+    "start time": "start_time",
+    "duration": "duration",
+    "mosi": "mosi",
+    "miso": "miso",
+}
+
+def parse_header(line: bytes) -> dict:
+    names = next(csv.reader([line.decode()]))
+    columns = {}
+    for index, name in enumerate(names):
+        field = COLUMNS.get(name.strip().lower())
+        if field is not None:
+            columns[field] = index
+    missing = {"type", "start_time", "duration", "mosi", "miso"} - columns.keys()
+    if missing:
+        raise ValueError("Not a Logic 2 SPI analyzer export, missing column(s): " + ", ".join(sorted(missing)))
+    return columns
+
+def parse_bytes(value: str) -> bytes:
+    # Values are exported as "0x15", longer words as space separated bytes
+    return bytes(int(v, 16) for v in value.split())
+
+def parse_row(line: bytes) -> list:
+    if b'"' in line:
+        return next(csv.reader([line.decode()]))
+    return line.decode().rstrip("\r\n").split(",")
+
+def read_rows(path: str, columns: dict, start: int, end: int):
+    """Yield (offset, row) for the complete export rows between byte offsets start and end."""
+    typeCol = columns["type"]
+    with open(path, "rb") as f:
+        f.seek(start)
+        offset = start
+        while offset < end:
+            line = f.readline()
+            if not line:
+                break
+            lineOffset = offset
+            offset += len(line)
+            row = parse_row(line)
+            if len(row) > typeCol:
+                yield lineOffset, row
+
+def row_frame(row: list, columns: dict) -> AnalyzerFrame:
+    startTime = float(row[columns["start_time"]])
+    endTime = startTime + float(row[columns["duration"]])
+    data = {}
+    if row[columns["type"]] == "result":
+        data = { "mosi": parse_bytes(row[columns["mosi"]]), "miso": parse_bytes(row[columns["miso"]]) }
+    return AnalyzerFrame(row[columns["type"]], startTime, endTime, data)
+
+def read_frames(path: str, columns: dict, start: int, end: int):
+    """Yield (offset, AnalyzerFrame) for the export rows between byte offsets start and end."""
+    for offset, row in read_rows(path, columns, start, end):
+        yield offset, row_frame(row, columns)
+
+def create_analyzer(settings: dict) -> sx128x_in:
+    # Like Logic 2: settings are instance attributes by the time __init__ runs
+    analyzer = sx128x_in.__new__(sx128x_in)
+    for name, value in settings.items():
+        if not hasattr(sx128x_in, name):
+            raise ValueError("Unknown setting: " + name)
+        setattr(analyzer, name, value)
+    analyzer.__init__()
+    return analyzer
+
+def results(result) -> list:
+    # decode() returns nothing, one frame or a list of frames
+    if result is None:
+        return []
+    if isinstance(result, list):
+        return result
+    return [result]
+
+def render(frame: AnalyzerFrame) -> str:
+    # Same substitution Logic 2 does with the result_types format strings
+    text = sx128x_in.result_types[frame.type]["format"]
+    for key, value in frame.data.items():
+        text = text.replace("{{data." + key + "}}", str(value))
+    return text
+
+def row_time(f, columns: dict):
+    """Start time of the next complete row in f, None at the end of the file."""
+    for line in f:
+        row = parse_row(line)
+        if len(row) > columns["start_time"]:
+            try:
+                return float(row[columns["start_time"]])
+            except ValueError:
+                continue
+    return None
+
+def row_start(f, dataStart: int, position: int) -> int:
+    """Seek f to the first row starting at or after position and return its offset."""
+    if position > dataStart:
+        f.seek(position - 1)
+        f.readline()
+    else:
+        f.seek(dataStart)
+    return f.tell()
+
+def seek_time(path: str, columns: dict, dataStart: int, time: float) -> int:
+    """Offset of the first row starting at or after time, rows are sorted by start time."""
+    with open(path, "rb") as f:
+        low = dataStart
+        high = os.path.getsize(path)
+        while low < high:
+            middle = (low + high) // 2
+            row_start(f, dataStart, middle)
+            rowTime = row_time(f, columns)
+            if rowTime is None or rowTime >= time:
+                high = middle
+            else:
+                low = middle + 1
+        return row_start(f, dataStart, low)
+
+def first_enable(path: str, columns: dict, start: int) -> int:
+    """Offset of the first enable row at or after start, the file size when there is none."""
+    size = os.path.getsize(path)
+    typeCol = columns["type"]
+    for offset, row in read_rows(path, columns, start, size):
+        if row[typeCol] == "enable":
+            return offset
+    return size
+
+def prescan(path: str, columns: dict, scanStart: int, dataStart: int, shards: int, settings: dict, state=None) -> list:
+    """Split the export from dataStart into up to `shards` (offset, state) pairs at enable rows.
+
+    The pre-scan analyzer is seeded like the shards are, then with state, and reads the export from
+    scanStart. Only transactions with an opcode in PRESCAN_OPCODES are decoded, which is enough to
+    know the decoder state in effect at every shard boundary. Every other transaction costs a look
+    at the first MOSI byte after its enable row, no frames are built for it. A capture with ranging
+    results is not split."""
+    size = os.path.getsize(path)
+    step = max(1, (size - dataStart) // shards)
+    boundaries = []
+    nextBoundary = dataStart + step
+
+    analyzer = create_analyzer({ name: settings[name] for name in SEED_SETTINGS if name in settings })
+    # The shards report unknown transactions and everything else finish() prints themselves
+    analyzer.unknown_logging = "Off"
+    analyzer.finished = True
+    if state is not None:
+        analyzer.set_state(state)
+    typeCol = columns["type"]
+    mosiCol = columns["mosi"]
+    # Rows of the current transaction: [enable row] until its first result row, then the rows of a
+    # state transaction, None for any other transaction (skipped up to the next enable row)
+    pending = None
+    for offset, row in read_rows(path, columns, scanStart, size):
+        if not boundaries and offset >= dataStart:
+            boundaries.append((dataStart, analyzer.get_state()))
+        rowType = row[typeCol]
+        if rowType == "enable":
+            if offset >= nextBoundary:
+                boundaries.append((offset, analyzer.get_state()))
+                nextBoundary = offset + step
+            pending = [row]
+        elif pending is None:
+            continue
+        elif rowType == "result":
+            if len(pending) == 1:
+                mosi = row[mosiCol].split(None, 1)
+                if not mosi or int(mosi[0], 16) not in PRESCAN_OPCODES:
+                    pending = None
+                    continue
+            pending.append(row)
+        elif rowType == "disable":
+            if len(pending) > 1:
+                for r in pending:
+                    analyzer.decode(row_frame(r, columns))
+                analyzer.decode(row_frame(row, columns))
+            pending = None
+        else:
+            pending = None
+    if not boundaries:
+        boundaries.append((dataStart, analyzer.get_state()))
+    # The ranging statistics and their outlier window follow every result of the capture
+    if len(boundaries) > 1 and analyzer.ranging.count > 0:
+        print("Decoding in a single shard, ranging statistics carry state across the whole capture", file=sys.stderr)
+        boundaries = boundaries[:1]
+    return boundaries
+
+def decode_shard(path: str, columns: dict, start: int, end: int, state: dict, settings: dict, outPath: str, origin=None) -> tuple:
+    """(decoded frames, decode cache counters or None) of the export rows between byte offsets start and end."""
+    count = 0
+    # Keep diagnostics printed by the analyzer, from __init__ on, out of the decoded output when writing to stdout
+    with open(outPath, "w", newline="") as out, contextlib.redirect_stdout(sys.stderr):
+        analyzer = create_analyzer(settings)
+        analyzer.set_state(state)
+        # Snapshot and export times of every shard count from the start of the capture, like --start
+        if origin is not None:
+            if analyzer.snapshots is not None:
+                analyzer.snapshots.origin = origin
+            if analyzer.exportSink is not None:
+                analyzer.exportSink.origin = origin
+        writer = csv.writer(out)
+        for _, frame in read_frames(path, columns, start, end):
+            for result in results(analyzer.decode(frame)):
+                writer.writerow((repr(result.start_time), repr(result.end_time), result.type, render(result)))
+                count += 1
+        result = analyzer.flush()
+        if result is not None:
+            writer.writerow((repr(result.start_time), repr(result.end_time), result.type, render(result)))
+            count += 1
+        # The decode cache is reported for all shards together by replay()
+        cache = analyzer.cache
+        analyzer.cache = None
+        analyzer.finish()
+    return count, cache.counters() if cache is not None else None
+
+def sequential_settings(settings: dict) -> list:
+    """Names of the settings that need the whole capture decoded by one analyzer."""
+    return [name for name, values in SEQUENTIAL_SETTINGS.items() if settings.get(name, values[0]) not in values]
+
+def export_path(settings: dict):
+    """Export file the analyzers write to with these settings, None when the export is off."""
+    export = settings.get("export", "Off")
+    if export == "Off":
+        return None
+    return settings.get("export_file") or os.path.join(tempfile.gettempdir(), EXPORT_DEFAULT_FILES[export])
+
+def checkpoint_path(settings: dict):
+    """Snapshot file the analyzers write to with these settings, None when snapshots are off."""
+    if settings.get("checkpoints", "Off") == "Off":
+        return None
+    return settings.get("checkpoint_file") or os.path.join(tempfile.gettempdir(), CHECKPOINT_DEFAULT_FILE)
+
+def replay(path: str, output, jobs: int, shards: int, settings: dict, start=None, statePath=None) -> int:
+    sequential = sequential_settings(settings)
+    if shards > 1 and sequential:
+        print("Decoding in a single shard, {} carry state across the whole capture".format(", ".join(sequential)), file=sys.stderr)
+        shards = 1
+    with open(path, "rb") as f:
+        columns = parse_header(f.readline())
+        dataStart = f.tell()
+        origin = row_time(f, columns)
+    scanStart = dataStart
+    state = None
+    if start is not None and origin is not None:
+        if statePath is not None:
+            state = load_snapshot(statePath, start)
+            if state is not None:
+                scanStart = seek_time(path, columns, dataStart, origin + state["time"])
+        dataStart = first_enable(path, columns, seek_time(path, columns, dataStart, origin + start))
+        scanStart = min(scanStart, dataStart)
+    with contextlib.redirect_stdout(sys.stderr):
+        boundaries = prescan(path, columns, scanStart, dataStart, shards, settings, state)
+    ends = [offset for offset, _ in boundaries[1:]] + [os.path.getsize(path)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        parts = [os.path.join(tmp, "part%05d.csv" % i) for i in range(len(boundaries))]
+        shardSettings = [dict(settings) for part in parts]
+        # Shards writing to one export file would interleave their batches, each exports to a file of
+        # its own and the runs are appended to the export file in capture order
+        exportPath = export_path(settings)
+        exports = []
+        if exportPath is not None and len(parts) > 1:
+            exports = [part + ".export" for part in parts]
+            for shardSetting, export in zip(shardSettings, exports):
+                shardSetting["export_file"] = export
+        # Every shard dumps its traffic counters to a file of its own, they are merged into one dump
+        dumps = []
+        if settings.get("traffic_stats", "Off") != "Off" and len(parts) > 1:
+            dumps = [part + ".traffic.json" for part in parts]
+            for shardSetting, dump in zip(shardSettings, dumps):
+                shardSetting["traffic_dump_file"] = dump
+        # Every shard writes the snapshots of its part of the capture, they are merged in capture order
+        checkpointPath = checkpoint_path(settings)
+        checkpoints = []
+        if checkpointPath is not None and len(parts) > 1:
+            checkpoints = [part + ".state.jsonl" for part in parts]
+            for shardSetting, checkpoint in zip(shardSettings, checkpoints):
+                shardSetting["checkpoint_file"] = checkpoint
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [
+                pool.submit(decode_shard, path, columns, offset, end, state, shardSetting, part, origin)
+                for (offset, state), end, shardSetting, part in zip(boundaries, ends, shardSettings, parts)
+            ]
+            shardResults = [future.result() for future in futures]
+        count = sum(shardCount for shardCount, _ in shardResults)
+        cacheCounters = [counters for _, counters in shardResults if counters is not None]
+        if cacheCounters:
+            for line in merged_summary(cacheCounters, DECODE_CACHE_SIZES[settings["decode_cache"]]):
+                print(line, file=sys.stderr)
+        if exports:
+            with open(exportPath, "ab") as out:
+                for export in exports:
+                    with open(export, "rb") as f:
+                        shutil.copyfileobj(f, out)
+            print("Appended {} export runs to {}".format(len(exports), exportPath), file=sys.stderr)
+        if checkpoints:
+            merge_snapshots(checkpoints, checkpointPath)
+        if dumps:
+            shardDumps = []
+            for dump in dumps:
+                with open(dump) as f:
+                    shardDumps.append(json.load(f))
+            with contextlib.redirect_stdout(sys.stderr):
+                write_dump(merge_dumps(shardDumps), settings.get("traffic_dump_file", ""))
+        output.write("start_time,end_time,type,decoded\n")
+        for part in parts:
+            with open(part, "r", newline="") as f:
+                shutil.copyfileobj(f, output)
+    return count
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Decode a Logic 2 SPI analyzer CSV export with the SX128x in HLA")
+    parser.add_argument("input", help="SPI analyzer CSV export")
+    parser.add_argument("-o", "--output", help="decoded CSV output (default: stdout)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="worker processes (default: CPU count)")
+    parser.add_argument("--shards", type=int, default=None, help="number of shards (default: 4 per worker)")
+    parser.add_argument("-s", "--setting", action="append", default=[], metavar="NAME=VALUE",
+                        help="analyzer setting, e.g. packet_frames='Packets only' (repeatable)")
+    parser.add_argument("--start", type=float, default=None, metavar="SECONDS",
+                        help="decode from this many seconds after the first row of the export")
+    parser.add_argument("--state", default=None, metavar="SNAPSHOTS",
+                        help="decoder state snapshot file of the same capture, the pre-scan for --start begins at the last snapshot before it")
+    args = parser.parse_args(argv)
+
+    settings = dict(setting.split("=", 1) for setting in args.setting)
+    shards = args.shards if args.shards else 4 * args.jobs
+    if args.output:
+        with open(args.output, "w", newline="") as output:
+            count = replay(args.input, output, args.jobs, shards, settings, args.start, args.state)
+    else:
+        count = replay(args.input, sys.stdout, args.jobs, shards, settings, args.start, args.state)
+    print("Decoded {} transactions".format(count), file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,41 @@
+# Run-length coalescing of identical consecutive transactions (status/IRQ/RSSI polling).
+#
+# The first transaction of a run is emitted as usual, the identical ones that follow are held back
+# and emitted as a single "repeated" frame spanning them once a different transaction arrives.
+# Transactions are compared on their raw MOSI/MISO bytes and the packet type they were decoded with.
+
+class RunCoalescer:
+    def __init__(self, repeatedTypes: dict):
+        # Command frame result type -> result type of its repeated run frame
+        self.repeatedTypes = repeatedTypes
+        self.key = None
+        self.count = 0
+        self.frameType = None
+        self.start = None
+        self.end = None
+        self.data = None
+
+    def update(self, key: tuple, frameType: str, start, end, data: dict):
+        """(emit this frame, run frame or None), the run frame is (result type, start, end, data)."""
+        if key == self.key:
+            if self.count == 0:
+                self.start = start
+                self.data = data
+            self.count += 1
+            self.end = end
+            return False, None
+        run = self.flush()
+        self.key = key
+        self.frameType = frameType
+        return True, run
+
+    def flush(self):
+        """Run frame of the transactions held back so far, None when there are none."""
+        if self.count == 0:
+            return None
+        data = dict(self.data)
+        data["count"] = self.count
+        run = (self.repeatedTypes[self.frameType], self.start, self.end, data)
+        self.count = 0
+        self.data = None
+        return run
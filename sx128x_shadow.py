@@ -0,0 +1,128 @@
+# Shadow copy of the SX128x data buffer and register space, rebuilt from the SPI traffic.
+#
+# The 256 byte data buffer is a ring (addresses wrap at 0xFF) and is kept in a bytearray that is
+# updated with slice assignments, so a long capture costs O(bytes transferred). Register space is
+# 64 kB but only a few dozen registers are ever touched, so it is a sparse address -> value dict.
+# get_state()/set_state() carry the whole shadow in decoder state snapshots.
+
+BUFFER_SIZE = 256
+
+# Slice source for marking buffer bytes as known
+_KNOWN = b"\x01" * BUFFER_SIZE
+
+class ShadowModel:
+    def __init__(self):
+        self.buffer = bytearray(BUFFER_SIZE)
+        # 1 for every buffer byte whose content was written or read back at least once
+        self.known = bytearray(BUFFER_SIZE)
+        # Register contents as last written or read, and the values the host last wrote
+        self.registers = {}
+        self.written = {}
+
+        # SetBufferBaseAddress
+        self.txBase = 0
+        self.rxBase = 0
+
+        # Bytes of TX payload written contiguously from txBase since the last SetBufferBaseAddress
+        self.txLength = 0
+
+        # Last received packet reported by GetRxBufferStatus (rxStartBufferPointer, rxPayloadLength)
+        self.rxStart = 0
+        self.rxLength = 0
+
+    def store(self, offset: int, data):
+        # Ring write in at most two slice assignments per 256 bytes
+        position = 0
+        while position < len(data):
+            n = min(len(data) - position, BUFFER_SIZE - offset)
+            self.buffer[offset:offset + n] = data[position:position + n]
+            self.known[offset:offset + n] = _KNOWN[:n]
+            position += n
+            offset = 0
+
+    def load(self, offset: int, length: int):
+        """(contents, known) of length buffer bytes starting at offset."""
+        if offset + length <= BUFFER_SIZE:
+            return self.buffer[offset:offset + length], self.known[offset:offset + length]
+        contents = bytearray()
+        known = bytearray()
+        while len(contents) < length:
+            n = min(length - len(contents), BUFFER_SIZE - offset)
+            contents += self.buffer[offset:offset + n]
+            known += self.known[offset:offset + n]
+            offset = 0
+        return contents, known
+
+    def set_base_addresses(self, txBase: int, rxBase: int):
+        self.txBase = txBase
+        self.rxBase = rxBase
+        self.txLength = 0
+
+    def set_rx_status(self, rxStart: int, rxLength: int):
+        self.rxStart = rxStart
+        self.rxLength = rxLength
+
+    def write_buffer(self, offset: int, data):
+        self.store(offset, data)
+        # Writes that start inside or right after the TX payload extend it
+        relative = (offset - self.txBase) & 0xFF
+        if relative <= self.txLength:
+            self.txLength = max(self.txLength, min(BUFFER_SIZE, relative + len(data)))
+
+    def read_buffer(self, offset: int, data) -> str:
+        """Name the payload region that is read back, "" when it is neither the TX nor the last RX payload.
+
+        A read of TX payload bytes that differ from what was written is marked as such."""
+        region = ""
+        relative = (offset - self.txBase) & 0xFF
+        if relative < self.txLength:
+            region = "TX payload[{}:{}]".format(relative, min(relative + len(data), self.txLength))
+            contents, known = self.load(offset, len(data))
+            if contents != data and any(k and c != d for k, c, d in zip(known, contents, data)):
+                region += " differs from written"
+        else:
+            relative = (offset - self.rxStart) & 0xFF
+            if relative < self.rxLength:
+                region = "RX payload[{}:{}]".format(relative, min(relative + len(data), self.rxLength))
+        # What was read is what the chip holds now
+        self.store(offset, data)
+        return region
+
+    def write_register(self, address: int, data):
+        self.registers.update(zip(range(address, address + len(data)), data))
+        self.written.update(zip(range(address, address + len(data)), data))
+
+    def read_register(self, address: int, data):
+        """Previously written values [address, address + len(data)) if any of them differs from data, else None.
+
+        Registers that were never written are None in the returned list. Reads do not count as writes,
+        so read-only registers whose value changes (results, status) are never flagged."""
+        expected = list(map(self.written.get, range(address, address + len(data))))
+        mismatch = any(e is not None and e != d for e, d in zip(expected, data))
+        self.registers.update(zip(range(address, address + len(data)), data))
+        return expected if mismatch else None
+
+    def get_state(self) -> dict:
+        """JSON serializable copy of the shadow, register addresses as hex strings."""
+        return {
+            "buffer": self.buffer.hex(),
+            "known": self.known.hex(),
+            "registers": { "{:#06x}".format(address): value for address, value in sorted(self.registers.items()) },
+            "written": { "{:#06x}".format(address): value for address, value in sorted(self.written.items()) },
+            "txBase": self.txBase,
+            "rxBase": self.rxBase,
+            "txLength": self.txLength,
+            "rxStart": self.rxStart,
+            "rxLength": self.rxLength,
+        }
+
+    def set_state(self, state: dict):
+        self.buffer[:] = bytes.fromhex(state["buffer"])
+        self.known[:] = bytes.fromhex(state["known"])
+        self.registers = { int(address, 16): value for address, value in state["registers"].items() }
+        self.written = { int(address, 16): value for address, value in state["written"].items() }
+        self.txBase = state["txBase"]
+        self.rxBase = state["rxBase"]
+        self.txLength = state["txLength"]
+        self.rxStart = state["rxStart"]
+        self.rxLength = state["rxLength"]
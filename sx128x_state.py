@@ -0,0 +1,103 @@
+# Decoder state checkpoints: the state carried from one transaction to the next (packet type, last
+# modulation and packet params, the shadow data buffer and registers) as compact JSON snapshots.
+#
+# A snapshot is one JSON line, the time is seconds relative to the first transaction the analyzer
+# decoded (Logic 2 capture times are not serializable). Snapshots are written at most once per
+# interval of capture time and only when a state command changed the configuration since the last
+# one. The shadow rides along with those snapshots without causing one, the final state is written
+# by close(). Any snapshot seeds an analyzer, so a capture that starts mid-session or a
+# replay from the middle of a long capture decodes with the right packet type from the first
+# transaction. The offline replay sets the origin of every shard to the start of the capture and
+# merges the snapshot files of the shards with merge_snapshots().
+
+import json
+
+# Opcodes whose decoders change the state: GetPacketType, SetPacketType, SetModulationParams, SetPacketParams
+STATE_OPCODES = frozenset((0x03, 0x8A, 0x8B, 0x8C))
+
+# Opcodes whose decoders change the shadow: GetRxBufferStatus, WriteRegister, ReadRegister, WriteBuffer,
+# ReadBuffer, SetBufferBaseAddress
+SHADOW_OPCODES = frozenset((0x17, 0x18, 0x19, 0x1A, 0x1B, 0x8F))
+
+def configuration(state: dict) -> dict:
+    """The state without the shadow and the time, what a new snapshot is written for."""
+    return { key: value for key, value in state.items() if key != "shadow" and key != "time" }
+
+class Checkpoints:
+    def __init__(self, path: str, interval: float):
+        self.file = open(path, "w")
+        self.interval = interval
+        self.origin = None
+        self.end = None
+        # Capture time of the last snapshot, None before the first one
+        self.last = None
+        self.lastState = None
+        # Whether a state command ran since the last snapshot, the seeded state counts as one
+        self.changed = True
+
+    def update(self, opcode, start, end, analyzer):
+        """Feed one transaction, opcode is None for unknown transactions."""
+        if self.origin is None:
+            self.origin = start
+        self.end = end
+        if opcode in STATE_OPCODES:
+            self.changed = True
+        if not self.changed:
+            return
+        time = float(end - self.origin)
+        if self.last is None or time - self.last >= self.interval:
+            self.write(time, analyzer.get_state())
+
+    def write(self, time: float, state: dict):
+        self.last = time
+        self.changed = False
+        # State commands that repeat the current settings do not need a snapshot
+        if self.lastState is not None and configuration(state) == configuration(self.lastState):
+            return
+        self.append(time, state)
+
+    def append(self, time: float, state: dict):
+        self.lastState = state
+        self.file.write(json.dumps(dict(state, time=round(time, 9))) + "\n")
+
+    def close(self, state: dict):
+        # The final state, also when only the shadow changed since the last snapshot
+        if self.origin is not None and state != self.lastState:
+            self.append(float(self.end - self.origin), state)
+        self.file.close()
+
+def merge_snapshots(paths: list, path: str):
+    """Write the snapshots of consecutive parts of a capture to path, in the order of paths.
+
+    The times must share one origin. A part starts with a snapshot of the state it was seeded with and
+    ends with its final state. Snapshots that repeat the configuration before them are dropped, except
+    for the final state of the last part when it differs from the snapshot before it."""
+    lines = []
+    for part in paths:
+        with open(part) as f:
+            lines += [line for line in f if line.strip()]
+    lastState = None
+    with open(path, "w") as out:
+        for i, line in enumerate(lines):
+            state = json.loads(line)
+            del state["time"]
+            if lastState is not None:
+                if i < len(lines) - 1 and configuration(state) == configuration(lastState):
+                    continue
+                if state == lastState:
+                    continue
+            lastState = state
+            out.write(line)
+
+def load_snapshot(path: str, time=None):
+    """Last snapshot of the file at or before time (seconds, the last one when None), None when there is none."""
+    snapshot = None
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            state = json.loads(line)
+            if time is not None and state["time"] > time:
+                break
+            snapshot = state
+    return snapshot
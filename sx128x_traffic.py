@@ -0,0 +1,182 @@
+# Command mix and traffic counters for a whole capture.
+#
+# Counters are fixed size arrays indexed by opcode, so memory does not depend on the capture length.
+# Optional summary frames report every interval of capture time, finish() dumps the whole capture
+# as one JSON object. merge_dumps() combines the dumps of the shards of an offline replay.
+
+import json
+
+# Opcodes that only poll the chip: NOP, GetIrqStatus, GetRssiInst, GetStatus
+POLLING_OPCODES = frozenset((0x00, 0x15, 0x1F, 0xC0))
+
+# Number of opcodes named in a summary frame
+TOP_OPCODES = 3
+
+class TrafficCounters:
+    result_types = {
+        "TrafficSummary": {
+            "format": "Traffic: {{data.transactions}} commands ({{data.rate}}/s), polling {{data.polling}}% (idle {{data.idlePolls}}%), MOSI {{data.mosiBytes}} B, MISO {{data.misoBytes}} B, buffer payload {{data.payloadBytes}} B, top {{data.topOpcodes}}"
+        },
+    }
+
+    def __init__(self, names: dict, interval):
+        # Opcode -> command name
+        self.names = names
+        # Seconds of capture time per summary frame, None for the dump only
+        self.interval = interval
+        self.transactions = [0] * 256
+        self.mosiBytes = [0] * 256
+        self.misoBytes = [0] * 256
+        self.empty = 0
+        self.polling = 0
+        self.idlePolls = 0
+        self.payloadMosi = 0
+        self.payloadMiso = 0
+        self.first = None
+        self.last = None
+        # Counters of the current summary interval
+        self.intervalStart = None
+        self.intervalTransactions = [0] * 256
+        self.clear_interval()
+
+    def clear_interval(self):
+        self.intervalTransactions[:] = [0] * 256
+        self.intervalCount = 0
+        self.intervalPolling = 0
+        self.intervalIdle = 0
+        self.intervalMosi = 0
+        self.intervalMiso = 0
+        self.intervalPayload = 0
+
+    def update(self, mosi, mosiLength: int, misoLength: int, resultType: str, data: dict, start, end):
+        """Count one transaction, returns (result type, start, end, data) when it closes a summary interval."""
+        summary = None
+        if self.first is None:
+            self.first = start
+        if self.interval is not None:
+            if self.intervalStart is None:
+                self.intervalStart = start
+            else:
+                elapsed = float(start - self.intervalStart)
+                if elapsed >= self.interval:
+                    summary = self.summary(elapsed)
+                    self.clear_interval()
+                    self.intervalStart = start
+        self.last = end
+
+        if mosiLength == 0:
+            self.empty += 1
+            return summary
+        opcode = mosi[0]
+        self.transactions[opcode] += 1
+        self.mosiBytes[opcode] += mosiLength
+        self.misoBytes[opcode] += misoLength
+        payload = 0
+        if resultType.startswith("WriteBuffer"):
+            payload = data["length"]
+            self.payloadMosi += payload
+        elif resultType.startswith("ReadBuffer"):
+            payload = data["length"]
+            self.payloadMiso += payload
+        polling = opcode in POLLING_OPCODES
+        idle = resultType == "GetIrqStatus" and data["irqStatus"] == 0
+        self.polling += polling
+        self.idlePolls += idle
+
+        self.intervalTransactions[opcode] += 1
+        self.intervalCount += 1
+        self.intervalPolling += polling
+        self.intervalIdle += idle
+        self.intervalMosi += mosiLength
+        self.intervalMiso += misoLength
+        self.intervalPayload += payload
+        return summary
+
+    def name(self, opcode: int) -> str:
+        return self.names.get(opcode, "{:#04x}".format(opcode))
+
+    def summary(self, elapsed: float):
+        count = self.intervalCount
+        top = sorted(range(256), key=lambda opcode: -self.intervalTransactions[opcode])[:TOP_OPCODES]
+        return ("TrafficSummary", self.intervalStart, self.last, {
+            "transactions": count,
+            "rate": round(count / elapsed, 1),
+            "polling": round(self.intervalPolling / count * 100, 1) if count else 0.0,
+            "idlePolls": round(self.intervalIdle / count * 100, 1) if count else 0.0,
+            "mosiBytes": self.intervalMosi,
+            "misoBytes": self.intervalMiso,
+            "payloadBytes": self.intervalPayload,
+            "topOpcodes": ", ".join("{} x{}".format(self.name(opcode), self.intervalTransactions[opcode])
+                                    for opcode in top if self.intervalTransactions[opcode]),
+        })
+
+    def dump(self) -> dict:
+        total = sum(self.transactions)
+        duration = float(self.last - self.first) if self.first is not None else 0.0
+        return {
+            "transactions": total,
+            "emptyTransactions": self.empty,
+            "durationSeconds": duration,
+            "commandsPerSecond": total / duration if duration > 0 else None,
+            "mosiBytes": sum(self.mosiBytes),
+            "misoBytes": sum(self.misoBytes),
+            "bufferPayloadMosiBytes": self.payloadMosi,
+            "bufferPayloadMisoBytes": self.payloadMiso,
+            "pollingTransactions": self.polling,
+            "idlePolls": self.idlePolls,
+            "pollingRatio": self.polling / total if total else None,
+            "opcodes": {
+                "{:#04x}".format(opcode): {
+                    "name": self.name(opcode),
+                    "transactions": self.transactions[opcode],
+                    "mosiBytes": self.mosiBytes[opcode],
+                    "misoBytes": self.misoBytes[opcode],
+                }
+                for opcode in range(256) if self.transactions[opcode]
+            },
+        }
+
+    def finish(self, path: str):
+        write_dump(self.dump(), path)
+
+def merge_dumps(dumps: list) -> dict:
+    """One dump() of consecutive parts of a capture from the dumps of the parts.
+
+    The duration is the sum of the parts, without the gaps between the last transaction of a part
+    and the first of the next one."""
+    def total(field):
+        return sum(dump[field] for dump in dumps)
+
+    transactions = total("transactions")
+    duration = total("durationSeconds")
+    polling = total("pollingTransactions")
+    opcodes = {}
+    for dump in dumps:
+        for key, counters in dump["opcodes"].items():
+            entry = opcodes.setdefault(key, { "name": counters["name"], "transactions": 0, "mosiBytes": 0, "misoBytes": 0 })
+            entry["transactions"] += counters["transactions"]
+            entry["mosiBytes"] += counters["mosiBytes"]
+            entry["misoBytes"] += counters["misoBytes"]
+    return {
+        "transactions": transactions,
+        "emptyTransactions": total("emptyTransactions"),
+        "durationSeconds": duration,
+        "commandsPerSecond": transactions / duration if duration > 0 else None,
+        "mosiBytes": total("mosiBytes"),
+        "misoBytes": total("misoBytes"),
+        "bufferPayloadMosiBytes": total("bufferPayloadMosiBytes"),
+        "bufferPayloadMisoBytes": total("bufferPayloadMisoBytes"),
+        "pollingTransactions": polling,
+        "idlePolls": total("idlePolls"),
+        "pollingRatio": polling / transactions if transactions else None,
+        "opcodes": { key: opcodes[key] for key in sorted(opcodes) },
+    }
+
+def write_dump(dump: dict, path: str):
+    # Dump to path, printed as a single JSON line when no path is set
+    text = json.dumps(dump)
+    if path:
+        with open(path, "w") as f:
+            f.write(text + "\n")
+    else:
+        print("Traffic: " + text)